@@ -0,0 +1,66 @@
+"""
+出力TSVファイルからの再開（load_completed_filenames）のテスト
+"""
+import csv
+import io
+
+import pytest
+
+
+@pytest.fixture(params=['transcribe', 'transcribe_gemini'])
+def module(request):
+    return pytest.importorskip(request.param)
+
+
+def write_tsv(module, path, rows):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        f.write('\t'.join(module.TSV_FIELDS) + '\r\n')
+        for row in rows:
+            f.write(module.format_tsv_row(*row))
+
+
+def test_resume_after_long_transcript(module, tmp_path):
+    # csvモジュールの既定の列の長さの上限（131072文字）を超えるテキスト
+    output_path = tmp_path / 'out.tsv'
+    write_tsv(module, output_path, [
+        ('long.wav', 'あ' * 200000, 'ja'),
+        ('short.wav', 'こんにちは', 'ja'),
+    ])
+
+    assert module.load_completed_filenames(output_path) == {'long.wav', 'short.wav'}
+
+
+def test_resume_with_sanitized_filename(module, tmp_path):
+    output_path = tmp_path / 'out.tsv'
+    write_tsv(module, output_path, [('a\tb.wav', '"引用"\nテキスト', 'ja')])
+
+    completed = module.load_completed_filenames(output_path)
+    assert module.sanitize_tsv_field('a\tb.wav') in completed
+
+
+def test_resume_from_legacy_quoted_rows(module, tmp_path):
+    # 以前のバージョン（csv.DictWriter）は改行を含むテキストを引用符で囲んで書き込んでいた
+    output_path = tmp_path / 'out.tsv'
+    output_path.write_bytes(
+        'filename\ttext\tlanguage\r\n'
+        'a.wav\t"1行目\n2行目"\tja\r\n'
+        'b.wav\tテキスト\tja\r\n'.encode('utf-8')
+    )
+
+    assert module.load_completed_filenames(output_path) == {'a.wav', 'b.wav'}
+
+
+def test_missing_output_file(module, tmp_path):
+    assert module.load_completed_filenames(tmp_path / 'missing.tsv') == set()
+
+
+def test_format_tsv_row_matches_dict_writer(module):
+    rows = [('a.wav', 'テキスト', 'ja'), ('b.wav', '"引用"を含む', 'en')]
+    expected = io.StringIO()
+    writer = csv.DictWriter(expected, fieldnames=module.TSV_FIELDS, delimiter='\t')
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(dict(zip(module.TSV_FIELDS, row)))
+
+    actual = '\t'.join(module.TSV_FIELDS) + '\r\n' + ''.join(module.format_tsv_row(*row) for row in rows)
+    assert actual == expected.getvalue()
@@ -5,13 +5,32 @@ Whisperを使用して音声ファイルをテキストに変換し、TSV形式
 """
 
 import argparse
+import asyncio
+import bisect
 import csv
+import hashlib
+import importlib.util
+import json
+import multiprocessing
 import os
+import queue
+import socket
+import sqlite3
+import stat
 import sys
+import threading
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from difflib import SequenceMatcher
+from functools import lru_cache, partial
+from itertools import islice
 from pathlib import Path
-from typing import List, Tuple
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
 
 try:
+    import numpy as np
+    import torch
     import whisper
 except ImportError:
     print("エラー: whisperがインストールされていません。")
@@ -19,58 +38,1842 @@ except ImportError:
     print("  pip install -r requirements.txt")
     sys.exit(1)
 
+try:
+    import soundfile
+except ImportError:
+    # バッチの並べ替えに使うだけなので、無い場合はファイルサイズで代用する
+    soundfile = None
+
+try:
+    import torchaudio
+except (ImportError, OSError):
+    # MP3/M4Aのデコードとリサンプリングに使う。無い場合はFFmpegで読み込む
+    torchaudio = None
+
+# バッチ処理で長さ順に並べ替える範囲（バッチ数）
+SORT_WINDOW_BATCHES = 8
+
+# soundfile（libsndfile）で直接デコードする拡張子
+SOUNDFILE_EXTENSIONS = ('.wav', '.flac', '.ogg')
+
+# チャンクの継ぎ目で重複を探す範囲（文字数）
+STITCH_WINDOW_CHARS = 20
+
+
+def find_audio_files(directory: Path, extensions: Tuple[str, ...] = ('.wav', '.mp3', '.m4a')) -> List[Path]:
+    """
+    指定されたディレクトリから音声ファイルを再帰的に検索します。
+
+    Args:
+        directory: 検索対象のディレクトリ
+        extensions: 対象とする拡張子のタプル
+
+    Returns:
+        見つかった音声ファイルのPathオブジェクトのリスト
+    """
+    # ディレクトリツリーを一度だけ走査し、拡張子（大文字・小文字を区別しない）で絞り込む
+    exts = {ext.lower() for ext in extensions}
+    audio_files = []
+    stack = [str(directory)]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif os.path.splitext(entry.name)[1].lower() in exts:
+                        audio_files.append(Path(entry.path))
+        except OSError:
+            # 読み取れない（または走査中に削除された）ディレクトリは飛ばす
+            continue
+    return sorted(audio_files)
+
+
+# TSVの列名（ヘッダー行）
+TSV_FIELDS = ('filename', 'text', 'language')
+
+# テキスト中の区切り文字を空白に置き換える変換表
+_TAB_STRIP = str.maketrans({'\t': ' ', '\r': ' ', '\n': ' '})
+
+
+def sanitize_tsv_field(value: str) -> str:
+    """
+    TSVの列に書き込む値のタブ・改行を空白に置き換えます。
+    """
+    return value.translate(_TAB_STRIP)
+
+
+def _tsv_field(value: str) -> str:
+    # タブ・改行を取り除いた後で引用符を含む場合だけ、csvモジュールと同じ形式で囲む
+    value = sanitize_tsv_field(value)
+    if '"' in value:
+        value = '"' + value.replace('"', '""') + '"'
+    return value
+
+
+def format_tsv_row(filename: str, text: str, language: str) -> str:
+    """
+    文字起こし結果をTSVの1行に整形します。
+
+    ファイル名・テキスト中のタブ・改行は空白に置き換えるため、1件は必ず1行になります。
+    出力は csv.DictWriter（区切り文字はタブ）で書き込んだ場合と同じ形式です（行末は CRLF）。
+    """
+    return f"{_tsv_field(filename)}\t{_tsv_field(text)}\t{_tsv_field(language)}\r\n"
+
+
+def load_completed_filenames(output_path: Path) -> Set[str]:
+    """
+    既存の出力TSVファイルから、処理済みのファイル名を読み込みます。
+
+    Args:
+        output_path: 出力TSVファイルのパス
+
+    Returns:
+        処理済みのファイル名の集合（ファイルが存在しない場合は空集合）
+    """
+    if not output_path.exists():
+        return set()
+
+    # 以前のバージョンが書き込んだ、改行を含むテキストを引用符で囲んだ行も読めるよう csv で読み込む
+    # （長時間の音声の文字起こしは既定の上限の131072文字を超えるため、列の長さの上限を外す。
+    # Windowsでは C の long に収まる値しか指定できない）
+    csv.field_size_limit(min(sys.maxsize, 2 ** 31 - 1))
+    with open(output_path, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f, delimiter='\t')
+        # 1行目はヘッダー
+        next(reader, None)
+        return {sanitize_tsv_field(row[0]) for row in reader if row and row[0]}
+
+
+@lru_cache(maxsize=1024)
+def _file_digest(path: str, size: int, mtime_ns: int) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def file_digest(path: Path) -> str:
+    """
+    ファイル内容のBLAKE2bハッシュ値（128ビット）を計算します。
+
+    特徴量キャッシュと文字起こし結果のキャッシュの両方で使うため、
+    同じファイル（サイズ・更新日時が同じ）の結果は再計算せずに使い回します。
+    """
+    st = os.stat(path)
+    return _file_digest(str(path), st.st_size, st.st_mtime_ns)
+
+
+class TranscriptCache:
+    """
+    文字起こし結果をsqliteに保存するキャッシュです。
+
+    音声ファイルの内容のハッシュ値と、結果に影響する設定（signature）の組を
+    キーとするため、同じ内容のファイルはファイル名が違っても再利用されます。
+
+    reuse が False の場合は以前の実行で保存した結果を返さず（新しい結果で上書きする）、
+    この実行中に保存した結果だけを返します。
+    """
+
+    def __init__(self, path: Path, signature: str, reuse: bool = True):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.signature = signature
+        self.reuse = reuse
+        self._written: Set[str] = set()
+        # 先読みスレッドからも参照するため、接続の利用は1スレッドずつにする
+        self._lock = threading.Lock()
+        # 並列処理時は複数のワーカープロセスが同じファイルに書き込む
+        self._conn = sqlite3.connect(str(path), timeout=30, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS transcripts ('
+            'digest TEXT NOT NULL, signature TEXT NOT NULL, text TEXT NOT NULL, language TEXT, '
+            'PRIMARY KEY (digest, signature))'
+        )
+        self._conn.commit()
+
+    def get(self, digest: str) -> Optional[Tuple[str, str]]:
+        """
+        キャッシュ済みの (文字起こしテキスト, 言語コード) を返します。ない場合は None を返します。
+        """
+        if not self.reuse and digest not in self._written:
+            return None
+
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT text, language FROM transcripts WHERE digest = ? AND signature = ?',
+                (digest, self.signature)
+            ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def put(self, digest: str, text: str, language: str) -> None:
+        """
+        文字起こし結果を保存します。
+        """
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO transcripts (digest, signature, text, language) VALUES (?, ?, ?, ?)',
+                (digest, self.signature, text, language)
+            )
+            self._conn.commit()
+            self._written.add(digest)
+
+
+def lookup_transcript(
+    cache: Optional[TranscriptCache],
+    audio_path: Path
+) -> Tuple[Optional[str], Optional[Tuple[str, str]]]:
+    """
+    音声ファイルの内容のハッシュ値を計算し、文字起こし結果のキャッシュを引きます。
+
+    Returns:
+        (ハッシュ値, キャッシュ済みの結果) のタプル（キャッシュを使わない場合やファイルを読めない場合は None）
+    """
+    if cache is None:
+        return None, None
+
+    try:
+        digest = file_digest(audio_path)
+    except OSError:
+        # 読み込めないファイルのエラーは、文字起こしの際に報告する
+        return None, None
+
+    return digest, cache.get(digest)
+
+
+def load_audio_fast(audio_path: Path) -> np.ndarray:
+    """
+    FFmpegのサブプロセスを起動せずに、音声ファイルを16kHzモノラルの波形として読み込みます。
+
+    WAV/FLAC/OGGはsoundfile、それ以外（MP3/M4Aなど）はtorchaudioでデコードし、
+    torchaudioでリサンプリングします。torchaudioが無く16kHz以外のファイルを
+    リサンプリングできない場合や、デコードに失敗した場合は whisper.load_audio
+    （FFmpeg）で読み込みます。
+
+    Args:
+        audio_path: 音声ファイルのパス
+
+    Returns:
+        float32の音声波形
+    """
+    sample_rate = whisper.audio.SAMPLE_RATE
+    use_soundfile = soundfile is not None and audio_path.suffix.lower() in SOUNDFILE_EXTENSIONS
+
+    try:
+        if use_soundfile and torchaudio is None:
+            # リサンプリングできない場合は、デコードする前にFFmpegに任せる
+            use_soundfile = soundfile.info(str(audio_path)).samplerate == sample_rate
+
+        if use_soundfile:
+            audio, file_rate = soundfile.read(str(audio_path), dtype='float32', always_2d=True)
+            waveform = torch.from_numpy(audio.T)
+        elif torchaudio is not None:
+            waveform, file_rate = torchaudio.load(str(audio_path))
+        else:
+            return whisper.load_audio(str(audio_path))
+    except RuntimeError as e:
+        # soundfile・torchaudioのデコードエラーはいずれも RuntimeError（の派生クラス）
+        print(f"  注意: {audio_path.name} を直接読み込めなかったため、FFmpegで読み込みます: {e}")
+        return whisper.load_audio(str(audio_path))
+
+    waveform = waveform.mean(dim=0)
+    if file_rate != sample_rate:
+        waveform = torchaudio.functional.resample(waveform, file_rate, sample_rate)
+
+    return waveform.numpy().astype(np.float32, copy=False)
+
+
+def load_audio_cached(
+    audio_path: Path,
+    cache_dir: Optional[Path] = None,
+    regenerate: bool = False
+) -> np.ndarray:
+    """
+    音声ファイルを16kHzモノラルの波形として読み込みます。
+
+    cache_dir が指定されている場合、デコード済みの波形を
+    cache_dir/<ハッシュ値[:2]>/<ハッシュ値>.<サンプルレート>.npy に保存し、
+    次回以降はデコードを行わずにキャッシュから読み込みます。
+
+    Args:
+        audio_path: 音声ファイルのパス
+        cache_dir: キャッシュの保存先ディレクトリ（Noneの場合はキャッシュしない）
+        regenerate: キャッシュが存在しても再生成するか
+
+    Returns:
+        float32の音声波形
+    """
+    if cache_dir is None:
+        return load_audio_fast(audio_path)
+
+    digest = file_digest(audio_path)
+    cache_path = cache_dir / digest[:2] / f'{digest}.{whisper.audio.SAMPLE_RATE}.npy'
+    if cache_path.exists() and not regenerate:
+        return np.load(cache_path)
+
+    audio = load_audio_fast(audio_path)
+
+    # 並列実行時に書きかけのファイルを読まないよう、一時ファイルから置き換える
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_name(f'{digest}.{os.getpid()}.tmp.npy')
+    np.save(tmp_path, audio)
+    os.replace(tmp_path, cache_path)
+
+    return audio
+
+
+# プロセスごとに一度だけロードするSilero VADモデル（_speech_timestamps で遅延ロード）
+_vad_model = None
+
+# VADモデルは内部状態を持つため、先読みスレッドとメインスレッドから同時に使わないようにする
+_vad_lock = threading.Lock()
+
+
+def _speech_timestamps(audio: np.ndarray, **options) -> List[Dict[str, int]]:
+    """
+    Silero VADで音声区間を検出します。初回呼び出し時にVADモデルをロードします。
+
+    Args:
+        audio: 16kHzの音声波形
+        **options: get_speech_timestamps に渡すオプション
+
+    Returns:
+        音声区間の開始・終了サンプル（'start' / 'end'）の辞書のリスト
+    """
+    global _vad_model
+
+    try:
+        from silero_vad import get_speech_timestamps, load_silero_vad
+    except ImportError:
+        raise ImportError("silero-vadがインストールされていません（pip install silero-vad）")
+
+    with _vad_lock:
+        if _vad_model is None:
+            _vad_model = load_silero_vad()
+
+        return get_speech_timestamps(
+            torch.from_numpy(np.ascontiguousarray(audio)),
+            _vad_model,
+            sampling_rate=whisper.audio.SAMPLE_RATE,
+            **options
+        )
+
+
+def trim_silence(
+    audio: np.ndarray,
+    min_silence_ms: int = 500,
+    speech_pad_ms: int = 200
+) -> np.ndarray:
+    """
+    Silero VADで音声区間を検出し、無音区間を取り除いた波形を返します。
+
+    Args:
+        audio: 16kHzの音声波形
+        min_silence_ms: 区切りとみなす無音の最小長（ミリ秒）
+        speech_pad_ms: 各音声区間の前後に残す余白（ミリ秒）
+
+    Returns:
+        音声区間のみを連結した波形（音声区間がない場合は空の配列）
+    """
+    timestamps = _speech_timestamps(audio, min_silence_duration_ms=min_silence_ms, speech_pad_ms=speech_pad_ms)
+    if not timestamps:
+        return audio[:0]
+
+    return np.concatenate([audio[t['start']:t['end']] for t in timestamps])
+
+
+def split_by_vad(
+    audio: np.ndarray,
+    max_len_s: float = 30.0,
+    overlap_s: float = 0.5,
+    min_silence_ms: int = 300
+) -> List[Tuple[int, int, np.ndarray]]:
+    """
+    長い音声波形を max_len_s 秒以内のチャンクに分割します。
+
+    Silero VADで検出した無音区間の中央で区切ります。max_len_s 秒以内に
+    区切れる無音がない場合（またはsilero-vadがない場合）は max_len_s 秒で切り、
+    次のチャンクを overlap_s 秒だけ重ねて始めます。
+
+    Args:
+        audio: 16kHzの音声波形
+        max_len_s: チャンクの最大長（秒）
+        overlap_s: 無音以外で区切る場合に重ねる長さ（秒）
+        min_silence_ms: 区切りとみなす無音の最小長（ミリ秒）
+
+    Returns:
+        (開始サンプル, 終了サンプル, 波形) のタプルのリスト
+    """
+    sample_rate = whisper.audio.SAMPLE_RATE
+    max_len = int(max_len_s * sample_rate)
+    overlap = int(overlap_s * sample_rate)
+    total = len(audio)
+
+    if total <= max_len:
+        return [(0, total, audio)]
+
+    try:
+        timestamps = _speech_timestamps(audio, min_silence_duration_ms=min_silence_ms, speech_pad_ms=0)
+        boundaries = [(a['end'] + b['start']) // 2 for a, b in zip(timestamps, timestamps[1:])]
+    except ImportError:
+        boundaries = []
+
+    chunks = []
+    start = 0
+    while total - start > max_len:
+        limit = start + max_len
+        # 極端に短いチャンクができないよう、後半にある無音だけを区切りの候補にする
+        i = bisect.bisect_right(boundaries, limit)
+        if i > 0 and boundaries[i - 1] > start + max_len // 2:
+            end = next_start = boundaries[i - 1]
+        else:
+            end = limit
+            next_start = limit - overlap
+
+        chunks.append((start, end, audio[start:end]))
+        start = next_start
+
+    chunks.append((start, total, audio[start:]))
+    return chunks
+
+
+def stitch_chunks(chunks: List[Tuple[int, int, str]]) -> str:
+    """
+    チャンクごとの文字起こし結果を1つのテキストに連結します。
+
+    前のチャンクと重なっているチャンクは、前のテキストの末尾と一致する
+    先頭部分を取り除いてから連結します。
+
+    Args:
+        chunks: (開始サンプル, 終了サンプル, 文字起こしテキスト) のタプルのリスト
+
+    Returns:
+        連結したテキスト
+    """
+    text = ''
+    prev_end = 0
+
+    for start, end, chunk_text in chunks:
+        chunk_text = chunk_text.strip()
+
+        if text and chunk_text and start < prev_end:
+            tail = text[-STITCH_WINDOW_CHARS:]
+            head = chunk_text[:STITCH_WINDOW_CHARS]
+            match = SequenceMatcher(None, tail, head, autojunk=False).find_longest_match(
+                0, len(tail), 0, len(head)
+            )
+            if match.size >= 3:
+                chunk_text = chunk_text[match.b + match.size:].lstrip()
+
+        if text and chunk_text:
+            # 日本語など空白で区切らない言語は、そのまま連結する
+            if text[-1].isascii() and chunk_text[0].isascii():
+                text += ' '
+        text += chunk_text
+        prev_end = end
+
+    return text
+
+
+def load_speech_audio(
+    audio_path: Path,
+    cache_dir: Optional[Path] = None,
+    regenerate: bool = False,
+    vad: bool = False,
+    vad_min_silence_ms: int = 500
+) -> np.ndarray:
+    """
+    音声ファイルを読み込み、必要に応じてVADで無音区間を取り除きます。
+
+    Args:
+        audio_path: 音声ファイルのパス
+        cache_dir: デコード済み音声のキャッシュ先（load_audio_cached を参照）
+        regenerate: キャッシュが存在しても再生成するか
+        vad: VADで無音区間を取り除くか
+        vad_min_silence_ms: 区切りとみなす無音の最小長（ミリ秒）
+
+    Returns:
+        float32の音声波形
+    """
+    audio = load_audio_cached(audio_path, cache_dir, regenerate)
+    if not vad or len(audio) == 0:
+        return audio
+
+    speech = trim_silence(audio, min_silence_ms=vad_min_silence_ms)
+    sample_rate = whisper.audio.SAMPLE_RATE
+    print(f"  VAD: {audio_path.name}: 音声区間 {len(speech) / sample_rate:.1f}秒 / {len(audio) / sample_rate:.1f}秒"
+          f"（{len(speech) / len(audio):.0%}）")
+
+    return speech
+
+
+def _sdpa_qkv_attention(self, q, k, v, mask=None):
+    """
+    scaled_dot_product_attention を使う MultiHeadAttention.qkv_attention です。
+
+    use_sdpa に対応していない古いopenai-whisperに差し替えて使います。
+    """
+    n_ctx = q.shape[1]
+    q = q.view(*q.shape[:2], self.n_head, -1).permute(0, 2, 1, 3)
+    k = k.view(*k.shape[:2], self.n_head, -1).permute(0, 2, 1, 3)
+    v = v.view(*v.shape[:2], self.n_head, -1).permute(0, 2, 1, 3)
+
+    # mask はデコーダの自己注意でのみ渡される因果マスク
+    a = torch.nn.functional.scaled_dot_product_attention(q, k, v, is_causal=mask is not None and n_ctx > 1)
+    return a.permute(0, 2, 1, 3).flatten(start_dim=2), None
+
+
+def enable_fast_kernels() -> None:
+    """
+    openai-whisperの推論で高速なGPUカーネルを使うように設定します。
+
+    Ampere以降のGPUでfloat32の行列積にTF32を使い、アテンションを
+    scaled_dot_product_attention（対応GPUではFlashAttention）で計算します。
+    """
+    if torch.cuda.is_available():
+        torch.backends.cuda.matmul.allow_tf32 = True
+        torch.backends.cudnn.allow_tf32 = True
+        torch.set_float32_matmul_precision('high')
+
+    attention = whisper.model.MultiHeadAttention
+    if hasattr(attention, 'use_sdpa'):
+        attention.use_sdpa = True
+    elif hasattr(torch.nn.functional, 'scaled_dot_product_attention'):
+        attention.qkv_attention = _sdpa_qkv_attention
+
+
+def compile_model(model: whisper.Whisper, batch_size: int = 1) -> whisper.Whisper:
+    """
+    openai-whisperのエンコーダ・デコーダを torch.compile でコンパイルします。
+
+    エンコーダの入力は常に30秒分のメルスペクトログラムで形状が固定のため、
+    CUDA Graphsを使う reduce-overhead モードでコンパイルします。デコーダは
+    トークン列が1ステップごとに伸びるため、形状を動的として扱います。
+
+    初回のコンパイルには数分かかるため、実際に使うバッチの形状（1件ずつの
+    model.transcribe と、batch_size 件のバッチ）で無音の入力を一度推論しておきます。
+    以降 decode_waveforms はバッチを無音で batch_size 件に揃えるため、
+    最後の端数のバッチで再コンパイルされることもありません。
+
+    Args:
+        model: Whisperモデル
+        batch_size: decode_waveforms でまとめて推論するバッチの大きさ
+
+    Returns:
+        コンパイル済みのモデル
+    """
+    model.encoder = torch.compile(model.encoder, mode='reduce-overhead')
+    model.decoder = torch.compile(model.decoder, dynamic=True)
+
+    print("モデルをコンパイル中（初回は数分かかります）...")
+    silence = np.zeros(whisper.audio.N_SAMPLES, dtype=np.float32)
+    decode_waveforms([silence], model, 'en')
+    if batch_size > 1:
+        decode_waveforms([silence] * batch_size, model, 'en')
+
+    # decode_waveforms はこの件数にバッチを揃える
+    model.compiled_batch_size = batch_size
+
+    return model
+
+
+def load_model(
+    model_name: str,
+    backend: str = 'openai',
+    device: str = None,
+    compute_type: str = None,
+    model_dir: str = None,
+    num_workers: int = 1,
+    compile: bool = False,
+    compile_batch_size: int = 1,
+    cpu_threads: int = 0
+) -> Union[whisper.Whisper, 'faster_whisper.WhisperModel']:
+    """
+    文字起こしに使用するモデルをロードします。
+
+    Args:
+        model_name: Whisperモデルのサイズ
+        backend: 推論バックエンド（openai または faster-whisper）
+        device: 使用するデバイス（例: cpu, cuda, cuda:1。Noneの場合は cuda:0 または cpu）
+        compute_type: faster-whisperの計算精度（Noneの場合はGPUで int8_float16、CPUで int8）
+        model_dir: CTranslate2形式に変換済みのモデルディレクトリ（faster-whisperのみ）
+        num_workers: 同時に transcribe を実行できるスレッド数（faster-whisperのみ）
+        compile: torch.compile でモデルをコンパイルするか（openai-whisperのみ）
+        compile_batch_size: コンパイル時に想定するバッチの大きさ（compile_model を参照）
+        cpu_threads: CPUで推論する際のスレッド数（faster-whisperのみ。0の場合は既定値）
+
+    Returns:
+        ロードしたモデル
+    """
+    if device is None:
+        device = 'cuda:0' if torch.cuda.is_available() else 'cpu'
+    device_type, _, device_index = device.partition(':')
+
+    if backend != 'faster-whisper':
+        if device_type == 'cuda':
+            # 以降のCUDAカーネルやメモリ確保がすべてこのGPUで行われるようにする
+            torch.cuda.set_device(int(device_index or 0))
+        enable_fast_kernels()
+        model = whisper.load_model(model_name, device=device)
+        return compile_model(model, compile_batch_size) if compile else model
+
+    try:
+        from faster_whisper import WhisperModel
+    except ImportError:
+        raise ImportError("faster-whisperがインストールされていません（pip install faster-whisper）")
+
+    if compute_type is None:
+        compute_type = 'int8_float16' if device_type == 'cuda' else 'int8'
+
+    return WhisperModel(
+        model_dir or model_name,
+        device=device_type,
+        device_index=int(device_index or 0),
+        compute_type=compute_type,
+        num_workers=num_workers,
+        cpu_threads=cpu_threads
+    )
+
+
+def transcribe_audio(
+    audio_path: Path,
+    model: Union[whisper.Whisper, 'faster_whisper.WhisperModel'],
+    language: str = None,
+    audio: Optional[np.ndarray] = None,
+    loader: Callable[[Path], np.ndarray] = load_audio_cached,
+    decode_options: Optional[Dict[str, Any]] = None,
+    chunk_options: Optional[Dict[str, Any]] = None
+) -> Tuple[str, str]:
+    """
+    音声ファイルを文字起こしします。
+
+    Args:
+        audio_path: 音声ファイルのパス
+        model: Whisperモデル（openai-whisper または faster-whisper）
+        language: 言語コード（Noneの場合は自動判定）
+        audio: 読み込み済みの音声波形（省略時は loader でファイルから読み込み）
+        loader: 音声ファイルを波形として読み込む関数
+        decode_options: モデルの transcribe に渡す追加の引数（build_decode_options を参照）
+        chunk_options: 長い音声をチャンクに分割する設定（build_chunk_options を参照。Noneの場合は分割しない）
+
+    Returns:
+        (文字起こしテキスト, 検出された言語コード) のタプル
+    """
+    decode_options = decode_options or {}
+
+    try:
+        source = audio if audio is not None else loader(audio_path)
+
+        # 言語が指定されている場合はそれを使用、そうでなければ自動判定
+        if language and language.lower() == 'auto':
+            language = None
+
+        # VADで音声区間が見つからなかった場合はモデルを呼ばない
+        if len(source) == 0:
+            return '', language or 'unknown'
+
+        if chunk_options and len(source) > chunk_options['chunk_seconds'] * whisper.audio.SAMPLE_RATE:
+            return transcribe_chunks(source, model, language, decode_options, **chunk_options)
+
+        if isinstance(model, whisper.Whisper):
+            if language:
+                result = model.transcribe(source, language=language, **decode_options)
+            else:
+                result = model.transcribe(source, **decode_options)
+
+            text = result['text'].strip()
+            detected_language = result.get('language', 'unknown')
+        else:
+            # faster-whisper はセグメントをジェネレータで返すため、ここで結合する
+            segments, info = model.transcribe(source, language=language, **decode_options)
+            text = ''.join(segment.text for segment in segments).strip()
+            detected_language = info.language
+
+        return text, detected_language
+
+    except Exception as e:
+        print(f"  エラー: {audio_path.name} の処理中にエラーが発生しました: {e}")
+        return None, None
+
+
+def decode_waveforms(
+    audios: List[np.ndarray],
+    model: whisper.Whisper,
+    language: str = None,
+    decode_options: Optional[Dict[str, Any]] = None
+) -> List[Tuple[str, str]]:
+    """
+    30秒以内の音声波形をまとめて1つのバッチとしてデコードします。
+
+    decode_options を指定した場合は model.transcribe と同じ基準で結果を確認し、
+    無音と判定された音声は空文字列にし、繰り返しなどで確信度の低い結果は
+    温度を上げて再試行する model.transcribe でその音声だけやり直します。
+
+    Args:
+        audios: 16kHzの音声波形のリスト（それぞれ30秒以内）
+        model: Whisperモデル
+        language: 言語コード（Noneの場合は自動判定）
+        decode_options: model.transcribe に渡す追加の引数（no_speech_threshold などの基準にも使用）
+
+    Returns:
+        入力と同じ順番の (文字起こしテキスト, 検出された言語コード) のタプルのリスト
+    """
+    options = whisper.DecodingOptions(
+        language=language,
+        without_timestamps=True,
+        fp16=model.device.type == 'cuda'
+    )
+
+    # compile_model でコンパイルしたモデルは、バッチの形状が変わると再コンパイルされるため件数を揃える
+    group_size = getattr(model, 'compiled_batch_size', None) or len(audios)
+    silence = np.zeros(whisper.audio.N_SAMPLES, dtype=np.float32)
+
+    decoded = []
+    for start in range(0, len(audios), group_size):
+        group = audios[start:start + group_size]
+        padded = group + [silence] * (group_size - len(group))
+        mels = [whisper.log_mel_spectrogram(whisper.pad_or_trim(audio), model.dims.n_mels) for audio in padded]
+        # [B, n_mels, 3000] のバッチを渡すと、エンコーダはバッチ全体に対して一度だけ実行される
+        decoded.extend(whisper.decode(model, torch.stack(mels).to(model.device), options)[:len(group)])
+
+    if decode_options is None:
+        return [(result.text.strip(), result.language) for result in decoded]
+
+    no_speech_threshold = decode_options.get('no_speech_threshold')
+    logprob_threshold = decode_options.get('logprob_threshold')
+    compression_ratio_threshold = decode_options.get('compression_ratio_threshold', 2.4)
+
+    results = []
+    for audio, result in zip(audios, decoded):
+        low_logprob = logprob_threshold is not None and result.avg_logprob < logprob_threshold
+
+        if no_speech_threshold is not None and result.no_speech_prob > no_speech_threshold and (
+            logprob_threshold is None or low_logprob
+        ):
+            # 無音と判定（model.transcribe がセグメントを読み飛ばす条件と同じ）
+            results.append(('', result.language))
+        elif low_logprob or (
+            compression_ratio_threshold is not None and result.compression_ratio > compression_ratio_threshold
+        ):
+            # 同じ文の繰り返しなど。温度を上げて再試行する通常の処理でやり直す
+            retry = model.transcribe(audio, language=language, **decode_options)
+            results.append((retry['text'].strip(), retry.get('language', result.language)))
+        else:
+            results.append((result.text.strip(), result.language))
+
+    return results
+
+
+def transcribe_chunks(
+    audio: np.ndarray,
+    model: Union[whisper.Whisper, 'faster_whisper.WhisperModel'],
+    language: str = None,
+    decode_options: Optional[Dict[str, Any]] = None,
+    chunk_seconds: float = 30.0,
+    overlap_seconds: float = 0.5,
+    workers: int = 4
+) -> Tuple[str, str]:
+    """
+    長い音声をチャンクに分割して並列に文字起こしし、結果を連結します。
+
+    openai-whisperでは workers 件ずつのチャンクを1つのバッチとしてデコードし、
+    faster-whisperでは workers 個のスレッドでチャンクを同時に処理します。
+
+    Args:
+        audio: 16kHzの音声波形
+        model: Whisperモデル（openai-whisper または faster-whisper）
+        language: 言語コード（Noneの場合はチャンクごとに自動判定し、最も多い言語を返す）
+        decode_options: モデルの transcribe に渡す追加の引数（openai-whisperでは decode_waveforms の判定にも使用）
+        chunk_seconds: チャンクの最大長（秒）
+        overlap_seconds: 無音以外で区切る場合に重ねる長さ（秒）
+        workers: 同時に処理するチャンク数
+
+    Returns:
+        (文字起こしテキスト, 検出された言語コード) のタプル
+    """
+    chunks = split_by_vad(audio, chunk_seconds, overlap_seconds)
+    print(f"  {len(chunks)} チャンクに分割して処理します")
+
+    if isinstance(model, whisper.Whisper):
+        results = []
+        for start in range(0, len(chunks), workers):
+            results.extend(decode_waveforms(
+                [c[2] for c in chunks[start:start + workers]], model, language, decode_options
+            ))
+    else:
+        def transcribe_chunk(samples: np.ndarray) -> Tuple[str, str]:
+            segments, info = model.transcribe(samples, language=language, **(decode_options or {}))
+            return ''.join(segment.text for segment in segments), info.language
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(transcribe_chunk, [c[2] for c in chunks]))
+
+    text = stitch_chunks([(start, end, r[0]) for (start, end, _), r in zip(chunks, results)])
+    detected_language = language or Counter(r[1] for r in results).most_common(1)[0][0]
+
+    return text, detected_language
+
+
+def audio_length_key(audio_path: Path) -> Tuple[int, float]:
+    """
+    バッチを組むための、音声の長さの並べ替えキーを返します。
+
+    soundfileでヘッダーから再生時間（秒）を読み取ります。読み取れない形式
+    （m4aなど）やsoundfileが無い場合はファイルサイズで代用し、
+    秒で比較できるファイルの後ろにまとめます。
+
+    Args:
+        audio_path: 音声ファイルのパス
+
+    Returns:
+        (0, 再生時間) または (1, ファイルサイズ) のタプル
+    """
+    if soundfile is not None:
+        try:
+            info = soundfile.info(str(audio_path))
+            return 0, info.frames / info.samplerate
+        except Exception:
+            pass
+
+    try:
+        return 1, float(audio_path.stat().st_size)
+    except OSError:
+        return 1, 0.0
+
+
+def transcribe_batch(
+    audio_paths: List[Path],
+    model: whisper.Whisper,
+    language: str = None,
+    loader: Callable[[Path], np.ndarray] = load_audio_cached,
+    decode_options: Optional[Dict[str, Any]] = None,
+    chunk_options: Optional[Dict[str, Any]] = None
+) -> List[Tuple[Optional[str], Optional[str]]]:
+    """
+    複数の短い音声ファイルをまとめて文字起こしします。
+
+    30秒以内の音声は decode_waveforms で1つのバッチにまとめてデコードします。30秒を超える音声は
+    transcribe_audio による通常の逐次処理にフォールバックします。
+
+    Args:
+        audio_paths: 音声ファイルのパスのリスト
+        model: Whisperモデル
+        language: 言語コード（Noneの場合は自動判定）
+        loader: 音声ファイルを波形として読み込む関数
+        decode_options: モデルの transcribe に渡す追加の引数（バッチの結果の判定にも使用）
+        chunk_options: 30秒を超える音声をチャンクに分割する設定
+
+    Returns:
+        入力と同じ順番の (文字起こしテキスト, 検出された言語コード) のタプルのリスト
+    """
+    results = [(None, None)] * len(audio_paths)
+    batch_indices = []
+    batch_audios = []
+
+    for idx, audio_path in enumerate(audio_paths):
+        try:
+            audio = loader(audio_path)
+        except Exception as e:
+            print(f"  エラー: {audio_path.name} の読み込み中にエラーが発生しました: {e}")
+            continue
+
+        if len(audio) == 0:
+            # VADで音声区間が見つからなかった
+            results[idx] = ('', language if language and language.lower() != 'auto' else 'unknown')
+            continue
+
+        if len(audio) > whisper.audio.N_SAMPLES:
+            # 30秒を超える音声はスライディングウィンドウでの通常処理
+            results[idx] = transcribe_audio(
+                audio_path, model, language, audio=audio,
+                decode_options=decode_options, chunk_options=chunk_options
+            )
+            continue
+
+        batch_audios.append(audio)
+        batch_indices.append(idx)
+
+    if not batch_audios:
+        return results
+
+    try:
+        decoded = decode_waveforms(
+            batch_audios, model, language if language and language.lower() != 'auto' else None, decode_options
+        )
+        for idx, result in zip(batch_indices, decoded):
+            results[idx] = result
+
+    except Exception as e:
+        names = ', '.join(audio_paths[idx].name for idx in batch_indices)
+        print(f"  エラー: バッチ（{names}）の処理中にエラーが発生しました: {e}")
+
+    return results
+
+
+# ワーカープロセスごとに保持するWhisperモデル（_init_worker で一度だけロード）
+_worker_model = None
+
+# ワーカープロセスごとに開く文字起こし結果のキャッシュ（_init_worker で開く）
+_worker_cache = None
+
+
+def _init_worker(
+    counter,
+    workers: int,
+    load_options: Dict[str, Any],
+    cache_options: Optional[Dict[str, Any]] = None
+) -> None:
+    """
+    ワーカープロセスの初期化処理です。Whisperモデルを一度だけロードして保持します。
+
+    GPUが利用可能な場合は、ワーカーを起動順に各GPUへ割り当てます。
+    CPUの場合は、各ワーカーの推論スレッド数をCPUコア数をワーカー数で割った数にします。
+
+    Args:
+        counter: ワーカー番号の採番に使用する共有カウンタ
+        workers: ワーカープロセス数
+        load_options: load_model に渡す引数（deviceを除く）
+        cache_options: TranscriptCache に渡す引数（Noneの場合はキャッシュを使わない）
+    """
+    global _worker_model, _worker_cache
+
+    device = None
+    if torch.cuda.is_available():
+        with counter.get_lock():
+            index = counter.value
+            counter.value += 1
+        device = f'cuda:{index % torch.cuda.device_count()}'
+    else:
+        # 各ワーカーが全コア分のスレッドを使うと、ワーカー同士でコアを奪い合う
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        torch.set_num_threads(threads)
+        load_options = dict(load_options, cpu_threads=threads)
+
+    _worker_model = load_model(device=device, **load_options)
+    _worker_cache = TranscriptCache(**cache_options) if cache_options else None
+
+
+def _worker_transcribe(
+    audio_path: Path,
+    language: str = None,
+    loader: Callable[[Path], np.ndarray] = load_audio_cached,
+    decode_options: Optional[Dict[str, Any]] = None,
+    chunk_options: Optional[Dict[str, Any]] = None
+) -> Tuple[Optional[str], Optional[str]]:
+    """
+    ワーカープロセス内で保持しているモデルを使って文字起こしします。
+    """
+    digest, cached = lookup_transcript(_worker_cache, audio_path)
+    if cached is not None:
+        return cached
+
+    text, detected_language = transcribe_audio(
+        audio_path, _worker_model, language, loader=loader,
+        decode_options=decode_options, chunk_options=chunk_options
+    )
+    if digest is not None and text is not None:
+        _worker_cache.put(digest, text, detected_language)
+
+    return text, detected_language
+
+
+def prefetch_audio(
+    audio_files: Iterable[Path],
+    loader: Callable[[Path], Any] = load_audio_cached,
+    depth: int = 2
+) -> Iterator[Tuple[Path, Any, Optional[Exception]]]:
+    """
+    別スレッドで音声ファイルを先読みしながら、loader の戻り値を順番に返します。
+
+    GPUで推論している間に次のファイルのデコード（やVAD）を進めるため、
+    最大 depth 件まで先に読み込んでおきます。
+
+    Args:
+        audio_files: 音声ファイルのリスト（ジェネレータの場合は先読みするスレッドで順に取り出す）
+        loader: 音声ファイルを読み込む関数（音声波形や _load_uncached の戻り値を返す）
+        depth: 先読みしておくファイル数
+
+    Yields:
+        (音声ファイルのパス, loader の戻り値, 読み込み時の例外) のタプル（失敗時は戻り値が None）
+    """
+    buffer = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        # 呼び出し側が途中で終了した場合にスレッドが止まったままにならないよう、定期的に確認する
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce() -> None:
+        for audio_path in audio_files:
+            try:
+                item = (audio_path, loader(audio_path), None)
+            except Exception as e:
+                item = (audio_path, None, e)
+            if not put(item):
+                return
+        # 終端
+        put(None)
+
+    threading.Thread(target=produce, daemon=True).start()
+
+    try:
+        while True:
+            item = buffer.get()
+            if item is None:
+                return
+            yield item
+    finally:
+        stop.set()
+
+
+def _load_uncached(
+    audio_path: Path,
+    loader: Callable[[Path], np.ndarray],
+    cache: Optional[TranscriptCache]
+) -> Tuple[Optional[str], Optional[Tuple[str, str]], Optional[np.ndarray]]:
+    """
+    文字起こし結果のキャッシュを引き、キャッシュにない場合だけ音声ファイルを読み込みます。
+
+    Returns:
+        (ハッシュ値, キャッシュ済みの結果, 音声波形) のタプル
+    """
+    digest, cached = lookup_transcript(cache, audio_path)
+    audio = loader(audio_path) if cached is None else None
+    return digest, cached, audio
+
+
+def transcribe_serial(
+    audio_files: List[Path],
+    model: Union[whisper.Whisper, 'faster_whisper.WhisperModel'],
+    language: str = None,
+    loader: Callable[[Path], np.ndarray] = load_audio_cached,
+    decode_options: Optional[Dict[str, Any]] = None,
+    chunk_options: Optional[Dict[str, Any]] = None,
+    cache: Optional[TranscriptCache] = None
+) -> Iterator[Tuple[Path, Optional[str], Optional[str]]]:
+    """
+    音声ファイルを1件ずつ順番に文字起こしします。
+
+    次のファイルの読み込み（と文字起こし結果のキャッシュの確認）は
+    prefetch_audio で推論と並行して行います。
+
+    Args:
+        audio_files: 音声ファイルのリスト
+        model: Whisperモデル
+        language: 言語コード（Noneの場合は自動判定）
+        loader: 音声ファイルを波形として読み込む関数
+        decode_options: モデルの transcribe に渡す追加の引数（build_decode_options を参照）
+        chunk_options: 長い音声をチャンクに分割する設定（Noneの場合は分割しない）
+        cache: 文字起こし結果のキャッシュ（Noneの場合は使わない）
+
+    Yields:
+        (音声ファイルのパス, 文字起こしテキスト, 検出された言語コード) のタプル
+    """
+    load = partial(_load_uncached, loader=loader, cache=cache)
+    for i, (audio_path, loaded, error) in enumerate(prefetch_audio(audio_files, load), 1):
+        print(f"[{i}/{len(audio_files)}] 処理中: {audio_path.name}")
+        if error is not None:
+            print(f"  エラー: {audio_path.name} の処理中にエラーが発生しました: {error}")
+            yield audio_path, None, None
+            continue
+
+        digest, cached, audio = loaded
+        if cached is None and digest is not None:
+            # 先読みした後に、同じ内容のファイルの結果が保存されている場合がある
+            cached = cache.get(digest)
+        if cached is not None:
+            print("  キャッシュ済みの結果を使用")
+            yield audio_path, cached[0], cached[1]
+            continue
+
+        text, detected_language = transcribe_audio(
+            audio_path, model, language, audio=audio,
+            decode_options=decode_options, chunk_options=chunk_options
+        )
+        if digest is not None and text is not None:
+            cache.put(digest, text, detected_language)
+
+        yield audio_path, text, detected_language
+
+
+def transcribe_batched(
+    audio_files: List[Path],
+    model: whisper.Whisper,
+    language: str = None,
+    batch_size: int = 8,
+    loader: Callable[[Path], np.ndarray] = load_audio_cached,
+    decode_options: Optional[Dict[str, Any]] = None,
+    chunk_options: Optional[Dict[str, Any]] = None,
+    cache: Optional[TranscriptCache] = None
+) -> Iterator[Tuple[Path, Optional[str], Optional[str]]]:
+    """
+    音声ファイルを batch_size 件ずつまとめて文字起こしします。
+
+    長さの近いファイル同士でバッチを組むと、短い音声の推論が長い音声の
+    デコード終了を待たずに済むため、batch_size * SORT_WINDOW_BATCHES 件ごとに
+    長さ順に並べ替えてからバッチを組みます。結果は元の順番で返します。
+    次のバッチの読み込み（と文字起こし結果のキャッシュの確認）は
+    prefetch_audio で推論と並行して行います。
+
+    Args:
+        audio_files: 音声ファイルのリスト
+        model: Whisperモデル
+        language: 言語コード（Noneの場合は自動判定）
+        batch_size: 1バッチあたりのファイル数
+        loader: 音声ファイルを波形として読み込む関数
+        decode_options: モデルの transcribe に渡す追加の引数（バッチの結果の判定にも使用）
+        chunk_options: 30秒を超える音声をチャンクに分割する設定
+        cache: 文字起こし結果のキャッシュ（Noneの場合は使わない）
+
+    Yields:
+        (音声ファイルのパス, 文字起こしテキスト, 検出された言語コード) のタプル
+    """
+    total = len(audio_files)
+    window_size = batch_size * SORT_WINDOW_BATCHES
+    processed = 0
+
+    # 並べ替えた後の順番（元のインデックス）。sorted_files が追加し、バッチを組む際に取り出す
+    order = deque()
+
+    def sorted_files() -> Iterator[Path]:
+        # 長さの読み取りも先読みのスレッドで行うよう、ウィンドウに達してから並べ替える
+        for window_start in range(0, total, window_size):
+            window = list(range(window_start, min(window_start + window_size, total)))
+            window.sort(key=lambda i: audio_length_key(audio_files[i]))
+            order.extend(window)
+            for i in window:
+                yield audio_files[i]
+
+    # バッチを組む順番で先読みする
+    load = partial(_load_uncached, loader=loader, cache=cache)
+    prefetched = prefetch_audio(sorted_files(), load, depth=batch_size)
+
+    def preloaded(audio_path: Path) -> np.ndarray:
+        value, error = loaded.pop(audio_path)
+        if error is not None:
+            raise error
+        return value[2]
+
+    for window_start in range(0, total, window_size):
+        results = {}
+        next_index = window_start
+        window_len = min(window_size, total - window_start)
+        for start in range(0, window_len, batch_size):
+            size = min(batch_size, window_len - start)
+            print(f"[{processed + 1}-{processed + size}/{total}] バッチ処理中: {size} ファイル")
+            processed += size
+
+            loaded = {path: (value, error) for path, value, error in islice(prefetched, size)}
+            # order は先読みした分だけ追加済み
+            indices = [order.popleft() for _ in range(size)]
+            chunk = [audio_files[i] for i in indices]
+
+            # キャッシュ済みのファイルと、バッチ内で内容が重複するファイルはバッチから除く
+            misses = []
+            duplicates = {}
+            for i, audio_path in zip(indices, chunk):
+                value, error = loaded[audio_path]
+                digest = None
+                if error is None:
+                    digest, cached, _ = value
+                    if cached is None and digest is not None:
+                        cached = cache.get(digest)
+                    if cached is not None:
+                        print(f"  キャッシュ済みの結果を使用: {audio_path.name}")
+                        results[i] = cached
+                        continue
+                    if digest in duplicates:
+                        loaded.pop(audio_path)
+                        duplicates[digest].append(i)
+                        continue
+                    if digest is not None:
+                        duplicates[digest] = []
+                misses.append((i, audio_path, digest))
+
+            if misses:
+                decoded = transcribe_batch(
+                    [audio_path for _, audio_path, _ in misses],
+                    model, language, preloaded, decode_options, chunk_options
+                )
+                for (i, _, digest), (text, detected_language) in zip(misses, decoded):
+                    if digest is not None and text is not None:
+                        cache.put(digest, text, detected_language)
+                    results[i] = (text, detected_language)
+                    for duplicate in duplicates.get(digest, []):
+                        print(f"  同じ内容のファイルの結果を使用: {audio_files[duplicate].name}")
+                        results[duplicate] = (text, detected_language)
+
+            # 元の順番で揃ったところまで返す
+            while next_index in results:
+                audio_path = audio_files[next_index]
+                text, detected_language = results.pop(next_index)
+                next_index += 1
+                print(f"[{next_index}/{total}] 処理完了: {audio_path.name}")
+                yield audio_path, text, detected_language
+
+
+def transcribe_parallel(
+    audio_files: List[Path],
+    load_options: Dict[str, Any],
+    language: str = None,
+    workers: int = 2,
+    loader: Callable[[Path], np.ndarray] = load_audio_cached,
+    decode_options: Optional[Dict[str, Any]] = None,
+    chunk_options: Optional[Dict[str, Any]] = None,
+    cache_options: Optional[Dict[str, Any]] = None
+) -> Iterator[Tuple[Path, Optional[str], Optional[str]]]:
+    """
+    複数のワーカープロセスで音声ファイルを並列に文字起こしします。
+
+    各ワーカーは起動時にモデルを一度だけロードし、以降のファイルで使い回します。
+    結果は入力ファイルの順番どおりに返されます。
+
+    Args:
+        audio_files: 音声ファイルのリスト
+        load_options: 各ワーカーで load_model に渡す引数
+        language: 言語コード（Noneの場合は自動判定）
+        workers: ワーカープロセス数
+        loader: 音声ファイルを波形として読み込む関数（ワーカーに渡すためpickle可能であること）
+        decode_options: モデルの transcribe に渡す追加の引数（build_decode_options を参照）
+        chunk_options: 長い音声をチャンクに分割する設定（Noneの場合は分割しない）
+        cache_options: 各ワーカーで TranscriptCache に渡す引数（Noneの場合はキャッシュを使わない）
+
+    Yields:
+        (音声ファイルのパス, 文字起こしテキスト, 検出された言語コード) のタプル
+    """
+    # CUDAを安全に初期化できるよう、ワーカーは spawn で起動する
+    ctx = multiprocessing.get_context('spawn')
+    counter = ctx.Value('i', 0)
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=ctx,
+        initializer=_init_worker,
+        initargs=(counter, workers, load_options, cache_options)
+    ) as executor:
+        worker = partial(
+            _worker_transcribe, language=language, loader=loader,
+            decode_options=decode_options, chunk_options=chunk_options
+        )
+        results = executor.map(worker, audio_files, chunksize=1)
+        for i, (audio_path, (text, detected_language)) in enumerate(zip(audio_files, results), 1):
+            print(f"[{i}/{len(audio_files)}] 処理完了: {audio_path.name}")
+            yield audio_path, text, detected_language
+
+
+def build_cache_signature(args: argparse.Namespace) -> str:
+    """
+    コマンドライン引数から、文字起こし結果に影響する設定を表す文字列を組み立てます。
+    """
+    return json.dumps({
+        'model': args.model,
+        'backend': args.backend,
+        'model_dir': args.model_dir,
+        'compute_type': args.compute_type,
+        'language': args.language,
+        'vad': args.vad,
+        'vad_min_silence_ms': args.vad_min_silence_ms,
+        'chunk_seconds': args.chunk_seconds,
+        'chunk_overlap': args.chunk_overlap
+    }, sort_keys=True)
+
+
+def write_transcriptions(
+    transcriptions: Iterator[Tuple[Path, Optional[str], Optional[str]]],
+    output_file,
+    write_header: bool = True
+) -> Tuple[int, int]:
+    """
+    文字起こし結果を受け取りしだい、1件ずつTSVファイルへ書き込みます。
+
+    Args:
+        transcriptions: transcribe_serial などが返す文字起こし結果
+        output_file: 書き込み先のファイルオブジェクト
+        write_header: ヘッダー行を書き込むか
+
+    Returns:
+        (成功したファイル数, 失敗したファイル数) のタプル
+    """
+    successful = 0
+    failed = 0
+
+    if write_header:
+        output_file.write('\t'.join(TSV_FIELDS) + '\r\n')
+
+    for audio_path, text, language in transcriptions:
+        if text is not None:
+            output_file.write(format_tsv_row(audio_path.name, text, language))
+            output_file.flush()
+            successful += 1
+            # 処理結果のプレビュー（最初の50文字）
+            preview = text[:50] + '...' if len(text) > 50 else text
+            print(f"  完了: {preview}")
+        else:
+            failed += 1
+
+        print()
+
+    return successful, failed
+
+
+def run_transcription(
+    transcriptions: Iterator[Tuple[Path, Optional[str], Optional[str]]],
+    output_path: Path,
+    append: bool = False
+) -> Tuple[int, int]:
+    """
+    文字起こしを実行し、結果を出力TSVファイルへ書き込みます。
+
+    エラーや中断が発生した場合はメッセージを表示して終了します。
+
+    Args:
+        transcriptions: transcribe_serial などが返す文字起こし結果
+        output_path: 出力TSVファイルのパス
+        append: 既存のファイルに追記するか（追記時はヘッダーを書き込まない）
+
+    Returns:
+        (成功したファイル数, 失敗したファイル数) のタプル
+    """
+    try:
+        output_file = open(output_path, 'a' if append else 'w', newline='', encoding='utf-8')
+    except OSError as e:
+        print(f"エラー: TSVファイルを開けませんでした: {e}")
+        sys.exit(1)
+
+    print("文字起こしを開始します...")
+    print("=" * 80)
+
+    try:
+        with output_file:
+            successful, failed = write_transcriptions(transcriptions, output_file, write_header=not append)
+    except BrokenProcessPool as e:
+        print(f"エラー: ワーカープロセスが異常終了しました（モデルのロード失敗の可能性があります）: {e}")
+        sys.exit(1)
+    except KeyboardInterrupt:
+        print(f"\n中断しました。処理済みの結果は {output_path} に保存されています（再実行すると続きから処理します）")
+        sys.exit(130)
+    except OSError as e:
+        print(f"エラー: TSVファイルの書き込みに失敗しました: {e}")
+        sys.exit(1)
+
+    print("=" * 80)
+    print(f"\n✓ TSVファイルを出力しました: {output_path}")
+
+    return successful, failed
+
+
+def print_summary(successful: int, failed: int, skipped: int = 0) -> None:
+    """
+    処理結果のサマリーを表示します。
+    """
+    print("\n" + "=" * 80)
+    print("処理が完了しました")
+    print(f"  成功: {successful} ファイル")
+    print(f"  失敗: {failed} ファイル")
+    if skipped:
+        print(f"  スキップ: {skipped} ファイル（処理済み）")
+    print(f"  合計: {successful + failed + skipped} ファイル")
+    print("=" * 80)
+
+
+async def _handle_connection(
+    reader: asyncio.StreamReader,
+    writer: asyncio.StreamWriter,
+    model: Union[whisper.Whisper, 'faster_whisper.WhisperModel'],
+    executor: ThreadPoolExecutor,
+    language: str = None,
+    loader: Callable[[Path], np.ndarray] = load_audio_cached,
+    decode_options: Optional[Dict[str, Any]] = None,
+    chunk_options: Optional[Dict[str, Any]] = None
+) -> None:
+    """
+    クライアントから1行1件のJSONリクエストを受け取り、文字起こし結果をJSONで返します。
+
+    リクエスト: {"path": "音声ファイルのパス", "language": "ja"}（languageは省略可）
+    レスポンス: {"path": ..., "filename": ..., "text": ..., "language": ...}（失敗時は "error" を含む）
+    """
+    loop = asyncio.get_running_loop()
+
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+
+            try:
+                request = json.loads(line)
+                audio_path = Path(request['path'])
+                request_language = request.get('language', language)
+            except (ValueError, KeyError, TypeError) as e:
+                response = {'error': f"不正なリクエストです: {e}"}
+            else:
+                print(f"処理中: {audio_path}")
+                # モデルは同時に1件ずつ使用する（executor はワーカー1つ）
+                text, detected_language = await loop.run_in_executor(
+                    executor, partial(
+                        transcribe_audio, audio_path, model, request_language,
+                        loader=loader, decode_options=decode_options, chunk_options=chunk_options
+                    )
+                )
+                response = {
+                    'path': str(audio_path),
+                    'filename': audio_path.name,
+                    'text': text,
+                    'language': detected_language
+                }
+                if text is None:
+                    response['error'] = "文字起こしに失敗しました"
+
+            writer.write((json.dumps(response, ensure_ascii=False) + '\n').encode('utf-8'))
+            await writer.drain()
+    finally:
+        writer.close()
+
+
+async def serve(
+    socket_path: str,
+    model: Union[whisper.Whisper, 'faster_whisper.WhisperModel'],
+    language: str = None,
+    loader: Callable[[Path], np.ndarray] = load_audio_cached,
+    decode_options: Optional[Dict[str, Any]] = None,
+    chunk_options: Optional[Dict[str, Any]] = None
+) -> None:
+    """
+    Unixソケットで文字起こしリクエストを待ち受けます。
+
+    モデルは起動時に一度だけロードしたものを使い回すため、
+    リクエストごとのモデルロードやCUDAの初期化が不要になります。
+
+    Args:
+        socket_path: 待ち受けるUnixソケットのパス
+        model: Whisperモデル
+        language: リクエストで言語が指定されなかった場合の言語コード
+        loader: 音声ファイルを波形として読み込む関数
+        decode_options: モデルの transcribe に渡す追加の引数（build_decode_options を参照）
+        chunk_options: 長い音声をチャンクに分割する設定（Noneの場合は分割しない）
+    """
+    executor = ThreadPoolExecutor(max_workers=1)
+    server = await asyncio.start_unix_server(
+        partial(
+            _handle_connection, model=model, executor=executor, language=language,
+            loader=loader, decode_options=decode_options, chunk_options=chunk_options
+        ),
+        path=socket_path
+    )
+
+    print(f"リクエストを待ち受けています: {socket_path}（Ctrl-C で終了）")
+    async with server:
+        await server.serve_forever()
+
+
+def add_model_arguments(parser: argparse.ArgumentParser) -> None:
+    """
+    モデル・言語・キャッシュに関するコマンドライン引数を追加します。
+    """
+    parser.add_argument(
+        '--model', '-m',
+        type=str,
+        default='medium',
+        choices=['tiny', 'base', 'small', 'medium', 'large', 'turbo'],
+        help='Whisperモデルのサイズ（デフォルト: medium）'
+    )
 
-def find_audio_files(directory: Path, extensions: Tuple[str, ...] = ('.wav', '.mp3', '.m4a')) -> List[Path]:
+    parser.add_argument(
+        '--language', '-l',
+        type=str,
+        default='ja',
+        help='音声の言語コード（例: ja, en, auto）。autoで自動判定（デフォルト: ja）'
+    )
+
+    parser.add_argument(
+        '--backend',
+        type=str,
+        default='openai',
+        choices=['openai', 'faster-whisper'],
+        help='推論バックエンド。faster-whisperはCTranslate2による量子化推論で高速（デフォルト: openai）'
+    )
+
+    parser.add_argument(
+        '--compute-type',
+        type=str,
+        help='faster-whisperの計算精度（例: int8, int8_float16, float16）。省略時はGPUで int8_float16、CPUで int8'
+    )
+
+    parser.add_argument(
+        '--model-dir',
+        type=str,
+        help='CTranslate2形式に変換済みのモデルディレクトリ（faster-whisperのみ。指定時は --model より優先）'
+    )
+
+    parser.add_argument(
+        '--cache-features',
+        dest='cache_features',
+        action='store_true',
+        help='デコード済みの音声波形をキャッシュし、再実行時のデコードを省略'
+    )
+
+    parser.add_argument(
+        '--no-cache-features',
+        dest='cache_features',
+        action='store_false',
+        help='音声波形のキャッシュを無効化（デフォルト）'
+    )
+
+    parser.add_argument(
+        '--cache-dir',
+        type=str,
+        default='.cache',
+        help='キャッシュの保存先ディレクトリ（デフォルト: .cache）'
+    )
+
+    parser.add_argument(
+        '--cache-regenerate',
+        action='store_true',
+        help='既存のキャッシュを使わずに再生成'
+    )
+
+    parser.set_defaults(cache_features=False)
+
+    parser.add_argument(
+        '--vad',
+        dest='vad',
+        action='store_true',
+        help='Silero VADで無音区間を取り除いてから文字起こし（デフォルト。faster-whisperは内蔵VADを使用）'
+    )
+
+    parser.add_argument(
+        '--no-vad',
+        dest='vad',
+        action='store_false',
+        help='VADによる無音区間の除去を無効化'
+    )
+
+    parser.add_argument(
+        '--vad-min-silence-ms',
+        type=int,
+        default=500,
+        help='VADで区切りとみなす無音の最小長（ミリ秒）（デフォルト: 500）'
+    )
+
+    parser.set_defaults(vad=True)
+
+    parser.add_argument(
+        '--compile',
+        dest='compile',
+        action='store_true',
+        help='torch.compileでモデルをコンパイルして推論を高速化（openaiバックエンドのみ。初回に数分かかります）'
+    )
+
+    parser.add_argument(
+        '--no-compile',
+        dest='compile',
+        action='store_false',
+        help='モデルをコンパイルしない（デフォルト）'
+    )
+
+    parser.set_defaults(compile=False)
+
+    parser.add_argument(
+        '--chunk-seconds',
+        type=float,
+        default=0,
+        help='この長さ（秒）を超える音声を無音区間で分割し、並列に文字起こし（デフォルト: 0 = 分割しない）'
+    )
+
+    parser.add_argument(
+        '--chunk-overlap',
+        type=float,
+        default=0.5,
+        help='無音以外で分割する場合にチャンクを重ねる長さ（秒）（デフォルト: 0.5）'
+    )
+
+    parser.add_argument(
+        '--chunk-workers',
+        type=int,
+        default=4,
+        help='同時に処理するチャンク数（デフォルト: 4）'
+    )
+
+
+def check_model_arguments(args: argparse.Namespace) -> None:
     """
-    指定されたディレクトリから音声ファイルを再帰的に検索します。
+    add_model_arguments で追加した引数の値を検証し、不正な場合は終了します。
+    """
+    # openaiバックエンドのVADにはsilero-vadが必要（ファイルごとに失敗しないよう起動時に確認する）
+    if args.vad and args.backend == 'openai' and importlib.util.find_spec('silero_vad') is None:
+        print("エラー: silero-vadがインストールされていません")
+        print("以下のコマンドでインストールするか、--no-vad を指定してください:")
+        print("  pip install silero-vad")
+        sys.exit(1)
 
-    Args:
-        directory: 検索対象のディレクトリ
-        extensions: 対象とする拡張子のタプル
+    if args.compile and args.backend != 'openai':
+        print("エラー: --compile はopenaiバックエンドでのみ使用できます")
+        sys.exit(1)
 
-    Returns:
-        見つかった音声ファイルのPathオブジェクトのリスト
+    if args.chunk_seconds < 0:
+        print(f"エラー: --chunk-seconds には0以上の値を指定してください: {args.chunk_seconds}")
+        sys.exit(1)
+
+    if args.chunk_seconds > 30 and args.backend == 'openai':
+        print("エラー: openaiバックエンドでは --chunk-seconds に30秒以下を指定してください")
+        sys.exit(1)
+
+    if args.chunk_seconds and not 0 <= args.chunk_overlap < args.chunk_seconds:
+        print(f"エラー: --chunk-overlap には0以上 --chunk-seconds 未満の値を指定してください: {args.chunk_overlap}")
+        sys.exit(1)
+
+    if args.chunk_workers < 1:
+        print(f"エラー: --chunk-workers には1以上の値を指定してください: {args.chunk_workers}")
+        sys.exit(1)
+
+
+def build_load_options(args: argparse.Namespace) -> Dict[str, Any]:
     """
-    audio_files = []
-    for ext in extensions:
-        audio_files.extend(directory.rglob(f'*{ext}'))
-    return sorted(audio_files)
+    コマンドライン引数から load_model に渡す引数を組み立てます。
+    """
+    # decode_waveforms に渡すバッチの大きさ（並列処理時と serve では1件ずつ処理する）
+    compile_batch_size = getattr(args, 'batch_size', 1) if getattr(args, 'workers', 1) == 1 else 1
+    if args.chunk_seconds:
+        compile_batch_size = max(compile_batch_size, args.chunk_workers)
 
+    return {
+        'model_name': args.model,
+        'backend': args.backend,
+        'compute_type': args.compute_type,
+        'model_dir': args.model_dir,
+        'num_workers': args.chunk_workers if args.chunk_seconds else 1,
+        'compile': args.compile,
+        'compile_batch_size': compile_batch_size
+    }
 
-def transcribe_audio(
-    audio_path: Path,
-    model: whisper.Whisper,
-    language: str = None
-) -> Tuple[str, str]:
+
+def build_decode_options(args: argparse.Namespace) -> Dict[str, Any]:
     """
-    音声ファイルを文字起こしします。
+    コマンドライン引数から、モデルの transcribe に渡す追加の引数を組み立てます。
 
-    Args:
-        audio_path: 音声ファイルのパス
-        model: Whisperモデル
-        language: 言語コード（Noneの場合は自動判定）
+    無音や音楽の区間で同じ文が繰り返し出力されるのを防ぐため、
+    前のセグメントの出力を次のデコードの条件にしない設定にします。
+    """
+    if args.backend == 'faster-whisper':
+        return {
+            'beam_size': 5,
+            'vad_filter': args.vad,
+            'vad_parameters': {'min_silence_duration_ms': args.vad_min_silence_ms},
+            'condition_on_previous_text': False,
+            # 対数尤度が十分高ければ最初の温度で打ち切られる
+            'temperature': [0.0, 0.2, 0.4]
+        }
 
-    Returns:
-        (文字起こしテキスト, 検出された言語コード) のタプル
+    return {
+        'condition_on_previous_text': False,
+        'no_speech_threshold': 0.6,
+        'logprob_threshold': -1.0
+    }
+
+
+def build_chunk_options(args: argparse.Namespace) -> Optional[Dict[str, Any]]:
     """
-    try:
-        # 言語が指定されている場合はそれを使用、そうでなければ自動判定
-        if language and language.lower() != 'auto':
-            result = model.transcribe(str(audio_path), language=language)
-        else:
-            result = model.transcribe(str(audio_path))
+    コマンドライン引数から transcribe_chunks に渡す引数を組み立てます。
 
-        text = result['text'].strip()
-        detected_language = result.get('language', 'unknown')
+    --chunk-seconds が0の場合は分割しないため None を返します。
+    """
+    if not args.chunk_seconds:
+        return None
 
-        return text, detected_language
+    return {
+        'chunk_seconds': args.chunk_seconds,
+        'overlap_seconds': args.chunk_overlap,
+        'workers': args.chunk_workers
+    }
+
+
+def build_loader(args: argparse.Namespace) -> Callable[[Path], np.ndarray]:
+    """
+    コマンドライン引数（キャッシュ・VAD設定）から音声の読み込み関数を組み立てます。
+    """
+    return partial(
+        load_speech_audio,
+        cache_dir=Path(args.cache_dir) if args.cache_features else None,
+        regenerate=args.cache_regenerate,
+        # faster-whisper は transcribe 内蔵のVADフィルタを使うため、前処理でのVADは行わない
+        vad=args.vad and args.backend == 'openai',
+        vad_min_silence_ms=args.vad_min_silence_ms
+    )
+
+
+def socket_in_use(socket_path: Path) -> bool:
+    """
+    Unixソケットに接続できるか（他のプロセスが待ち受けているか）を返します。
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        try:
+            client.connect(str(socket_path))
+        except OSError:
+            return False
+    return True
+
+
+def serve_main(argv: List[str]) -> None:
+    """
+    serve サブコマンド: モデルを常駐させてUnixソケットでリクエストを待ち受けます。
+    """
+    parser = argparse.ArgumentParser(
+        prog='transcribe.py serve',
+        description='Whisperモデルを常駐させ、Unixソケットで文字起こしリクエストを待ち受けます。'
+    )
+
+    parser.add_argument(
+        '--socket',
+        type=str,
+        default='/tmp/whisper.sock',
+        help='待ち受けるUnixソケットのパス（デフォルト: /tmp/whisper.sock）'
+    )
+
+    add_model_arguments(parser)
+    args = parser.parse_args(argv)
+    check_model_arguments(args)
+
+    if not hasattr(socket, 'AF_UNIX'):
+        print("エラー: この環境ではUnixソケットがサポートされていません")
+        sys.exit(1)
 
+    # 前回の実行で残ったソケットファイルを削除（他のプロセスが待ち受け中の場合や、ソケット以外のファイルは削除しない）
+    socket_path = Path(args.socket)
+    if os.path.lexists(socket_path):
+        if not stat.S_ISSOCK(os.lstat(socket_path).st_mode):
+            print(f"エラー: {socket_path} はソケットではないファイルです")
+            sys.exit(1)
+        if socket_in_use(socket_path):
+            print(f"エラー: {socket_path} で既にサーバーが待ち受けています")
+            sys.exit(1)
+        socket_path.unlink()
+
+    print(f"Whisperモデルをロード中: {args.model}（{args.backend}）")
+    try:
+        model = load_model(**build_load_options(args))
     except Exception as e:
-        print(f"  エラー: {audio_path.name} の処理中にエラーが発生しました: {e}")
-        return None, None
+        print(f"エラー: モデルのロードに失敗しました: {e}")
+        sys.exit(1)
+
+    print("モデルのロードが完了しました")
+
+    try:
+        asyncio.run(serve(
+            str(socket_path), model, args.language, build_loader(args),
+            build_decode_options(args), build_chunk_options(args)
+        ))
+    except KeyboardInterrupt:
+        print("\n終了します")
+    finally:
+        if socket_path.exists():
+            socket_path.unlink()
+
+
+def submit_main(argv: List[str]) -> None:
+    """
+    submit サブコマンド: serve で起動したプロセスに音声ファイルを送り、結果をTSV形式で出力します。
+    """
+    parser = argparse.ArgumentParser(
+        prog='transcribe.py submit',
+        description='serve で起動したプロセスに音声ファイルを送り、文字起こし結果をTSV形式で出力します。'
+    )
+
+    parser.add_argument(
+        'paths',
+        nargs='+',
+        help='文字起こしする音声ファイルのパス'
+    )
+
+    parser.add_argument(
+        '--socket',
+        type=str,
+        default='/tmp/whisper.sock',
+        help='接続するUnixソケットのパス（デフォルト: /tmp/whisper.sock）'
+    )
+
+    parser.add_argument(
+        '--language', '-l',
+        type=str,
+        help='音声の言語コード（省略時は serve 起動時の設定を使用）'
+    )
+
+    parser.add_argument(
+        '--output', '-o',
+        type=str,
+        help='結果を追記するTSVファイルのパス（省略時は標準出力）'
+    )
+
+    args = parser.parse_args(argv)
+
+    if not hasattr(socket, 'AF_UNIX'):
+        print("エラー: この環境ではUnixソケットがサポートされていません", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        client.connect(args.socket)
+    except OSError as e:
+        print(f"エラー: {args.socket} に接続できませんでした（serve を起動してください）: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.output:
+        output_path = Path(args.output)
+        write_header = not output_path.exists()
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        output_file = open(output_path, 'a', newline='', encoding='utf-8')
+    else:
+        write_header = True
+        output_file = sys.stdout
+
+    failed = 0
+    with client, client.makefile('rwb') as stream:
+        if write_header:
+            output_file.write('\t'.join(TSV_FIELDS) + '\r\n')
+
+        for path in args.paths:
+            request = {'path': str(Path(path).resolve())}
+            if args.language:
+                request['language'] = args.language
+            stream.write((json.dumps(request, ensure_ascii=False) + '\n').encode('utf-8'))
+            stream.flush()
+
+            line = stream.readline()
+            if not line:
+                print("エラー: サーバーとの接続が切断されました", file=sys.stderr)
+                sys.exit(1)
+
+            response = json.loads(line)
+            if 'error' in response:
+                print(f"エラー: {path}: {response['error']}", file=sys.stderr)
+                failed += 1
+                continue
+
+            output_file.write(format_tsv_row(response['filename'], response['text'], response['language']))
+            output_file.flush()
+
+    if args.output:
+        output_file.close()
+
+    if failed:
+        sys.exit(1)
 
 
 def main():
+    # サブコマンド（serve / submit）
+    if len(sys.argv) > 1 and sys.argv[1] == 'serve':
+        serve_main(sys.argv[2:])
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == 'submit':
+        submit_main(sys.argv[2:])
+        return
+
     parser = argparse.ArgumentParser(
         description='音声ファイルを文字起こししてTSV形式で出力します。',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -88,6 +1891,36 @@ def main():
   # 言語を自動判定
   python transcribe.py --language auto
 
+  # デコード済み音声をキャッシュし、2回目以降の実行を高速化
+  python transcribe.py --cache-features
+
+  # 文字起こし結果のキャッシュを使わずに処理（デフォルトでは同じ内容のファイルの結果を再利用）
+  python transcribe.py --no-transcript-cache
+
+  # VADによる無音区間の除去を無効化（デフォルトでは有効）
+  python transcribe.py --no-vad
+
+  # torch.compileでモデルをコンパイルし、大量のファイルを高速に処理
+  python transcribe.py --compile --batch-size 16
+
+  # 長い音声を30秒以内のチャンクに分割し、8チャンクずつ並列に処理
+  python transcribe.py --chunk-seconds 30 --chunk-workers 8
+
+  # faster-whisper（CTranslate2 + int8量子化）バックエンドで高速処理
+  python transcribe.py --backend faster-whisper
+
+  # 独自に CTranslate2 形式へ変換したモデルを使用
+  ct2-transformers-converter --model openai/whisper-medium --output_dir whisper-medium-ct2 \\
+    --copy_files tokenizer.json preprocessor_config.json --quantization int8_float16
+  python transcribe.py --backend faster-whisper --model-dir whisper-medium-ct2
+
+  # モデルを常駐させ、別のプロセスからファイルを送って文字起こし
+  python transcribe.py serve --model medium --socket /tmp/whisper.sock
+  python transcribe.py submit audio1.wav audio2.mp3 --socket /tmp/whisper.sock
+
+  # 入力フォルダの変更を監視し、追加されたファイルだけを文字起こし
+  inotifywait -m -e close_write -e moved_to sources | python transcribe.py --persistent
+
   # すべてのオプションを指定
   python transcribe.py --input audio/ --output results.tsv --model small --language en
         """
@@ -107,31 +1940,82 @@ def main():
         help='出力TSVファイルのパス（デフォルト: output/transcriptions.tsv）'
     )
 
+    add_model_arguments(parser)
+
     parser.add_argument(
-        '--model', '-m',
+        '--extensions', '-e',
         type=str,
-        default='medium',
-        choices=['tiny', 'base', 'small', 'medium', 'large', 'turbo'],
-        help='Whisperモデルのサイズ（デフォルト: medium）'
+        nargs='+',
+        default=['.wav', '.mp3', '.m4a'],
+        help='処理する音声ファイルの拡張子（デフォルト: .wav .mp3 .m4a）'
     )
 
     parser.add_argument(
-        '--language', '-l',
-        type=str,
-        default='ja',
-        help='音声の言語コード（例: ja, en, auto）。autoで自動判定（デフォルト: ja）'
+        '--workers', '-w',
+        type=int,
+        default=1,
+        help='並列に文字起こしするワーカープロセス数。GPUが複数ある場合は各GPUに分散（デフォルト: 1）'
     )
 
     parser.add_argument(
-        '--extensions', '-e',
+        '--batch-size', '-b',
+        type=int,
+        default=8,
+        help='まとめて推論する30秒以内のファイル数。1でバッチ処理を無効化（デフォルト: 8）'
+    )
+
+    parser.add_argument(
+        '--resume',
+        dest='resume',
+        action='store_true',
+        help='出力TSVファイルに記録済みのファイルをスキップし、追記で再開（デフォルト）'
+    )
+
+    parser.add_argument(
+        '--no-resume', '--overwrite',
+        dest='resume',
+        action='store_false',
+        help='処理済みのファイルもすべて文字起こしし、出力TSVファイルを上書き'
+    )
+
+    parser.set_defaults(resume=True)
+
+    parser.add_argument(
+        '--transcript-cache',
         type=str,
-        nargs='+',
-        default=['.wav', '.mp3', '.m4a'],
-        help='処理する音声ファイルの拡張子（デフォルト: .wav .mp3 .m4a）'
+        default=None,
+        help='文字起こし結果のキャッシュ（sqlite）のパス（デフォルト: <--cache-dir>/transcripts.sqlite）'
+    )
+
+    parser.add_argument(
+        '--no-transcript-cache',
+        dest='transcript_cache_enabled',
+        action='store_false',
+        help='文字起こし結果のキャッシュを使わない'
+    )
+
+    parser.add_argument(
+        '--persistent',
+        action='store_true',
+        help='処理後もモデルを保持したまま待機し、標準入力から1行読むたびに入力ディレクトリを再走査して未処理のファイルを文字起こし'
     )
 
     args = parser.parse_args()
 
+    if args.workers < 1:
+        print(f"エラー: --workers には1以上の値を指定してください: {args.workers}")
+        sys.exit(1)
+
+    if args.batch_size < 1:
+        print(f"エラー: --batch-size には1以上の値を指定してください: {args.batch_size}")
+        sys.exit(1)
+
+    check_model_arguments(args)
+
+    if args.persistent and args.workers > 1:
+        print("エラー: --persistent と --workers（2以上）は同時に指定できません")
+        sys.exit(1)
+
     # 入力ディレクトリの確認
     input_dir = Path(args.input)
     if not input_dir.exists():
@@ -150,73 +2034,105 @@ def main():
     print(f"音声ファイルを検索中: {input_dir}")
     audio_files = find_audio_files(input_dir, tuple(args.extensions))
 
-    if not audio_files:
+    if not audio_files and not args.persistent:
         print(f"エラー: 音声ファイルが見つかりませんでした（対象拡張子: {', '.join(args.extensions)}）")
         sys.exit(1)
 
     print(f"見つかったファイル数: {len(audio_files)}")
 
-    # Whisperモデルのロード
-    print(f"\nWhisperモデルをロード中: {args.model}")
-    print("※ 初回実行時はモデルのダウンロードに時間がかかる場合があります")
-    try:
-        model = whisper.load_model(args.model)
-    except Exception as e:
-        print(f"エラー: モデルのロードに失敗しました: {e}")
-        sys.exit(1)
+    # 処理済みファイルのスキップ
+    completed = load_completed_filenames(output_path) if args.resume else set()
+    if completed:
+        total_found = len(audio_files)
+        audio_files = [p for p in audio_files if sanitize_tsv_field(p.name) not in completed]
+        skipped = total_found - len(audio_files)
+        print(f"処理済みのためスキップ: {skipped} ファイル（--overwrite で再処理）")
+        if not audio_files and not args.persistent:
+            print("すべてのファイルが処理済みです")
+            sys.exit(0)
+    else:
+        skipped = 0
 
-    print("モデルのロードが完了しました\n")
+    # 音声の読み込み方法（キャッシュ設定）
+    loader = build_loader(args)
 
-    # 文字起こし処理
-    results = []
-    successful = 0
-    failed = 0
+    # モデルに渡す文字起こしの設定
+    decode_options = build_decode_options(args)
+    chunk_options = build_chunk_options(args)
 
-    print("文字起こしを開始します...")
-    print("=" * 80)
+    # 同じ内容のファイルは文字起こし結果のキャッシュを使う
+    # （--overwrite / --cache-regenerate の場合は以前の結果を読まずに、新しい結果で上書きする）
+    cache = None
+    cache_options = None
+    if args.transcript_cache_enabled:
+        cache_options = {
+            'path': Path(args.transcript_cache or Path(args.cache_dir) / 'transcripts.sqlite'),
+            'signature': build_cache_signature(args),
+            'reuse': args.resume and not args.cache_regenerate,
+        }
+        try:
+            cache = TranscriptCache(**cache_options)
+        except (OSError, sqlite3.Error) as e:
+            print(f"エラー: 文字起こし結果のキャッシュを開けませんでした: {cache_options['path']}: {e}")
+            sys.exit(1)
 
-    for i, audio_path in enumerate(audio_files, 1):
-        print(f"[{i}/{len(audio_files)}] 処理中: {audio_path.name}")
+    # Whisperモデルのロード
+    load_options = build_load_options(args)
 
-        text, language = transcribe_audio(audio_path, model, args.language)
+    if args.workers > 1:
+        # 並列処理時は各ワーカープロセスがモデルをロードする
+        print(f"\nWhisperモデル: {args.model}（{args.backend}、{args.workers} ワーカーで並列処理）")
+        print("※ 各ワーカーの起動時にモデルをロードします\n")
+        transcribe = partial(
+            transcribe_parallel, load_options=load_options, language=args.language,
+            workers=args.workers, loader=loader,
+            decode_options=decode_options, chunk_options=chunk_options, cache_options=cache_options
+        )
+    else:
+        print(f"\nWhisperモデルをロード中: {args.model}（{args.backend}）")
+        print("※ 初回実行時はモデルのダウンロードに時間がかかる場合があります")
+        try:
+            model = load_model(**load_options)
+        except Exception as e:
+            print(f"エラー: モデルのロードに失敗しました: {e}")
+            sys.exit(1)
 
-        if text is not None:
-            results.append({
-                'filename': audio_path.name,
-                'text': text,
-                'language': language
-            })
-            successful += 1
-            # 処理結果のプレビュー（最初の50文字）
-            preview = text[:50] + '...' if len(text) > 50 else text
-            print(f"  完了: {preview}")
+        print("モデルのロードが完了しました\n")
+        # バッチ推論は openai-whisper バックエンドのみ対応
+        if args.batch_size > 1 and isinstance(model, whisper.Whisper):
+            transcribe = partial(
+                transcribe_batched, model=model, language=args.language,
+                batch_size=args.batch_size, loader=loader,
+                decode_options=decode_options, chunk_options=chunk_options, cache=cache
+            )
         else:
-            failed += 1
+            transcribe = partial(
+                transcribe_serial, model=model, language=args.language,
+                loader=loader, decode_options=decode_options, chunk_options=chunk_options, cache=cache
+            )
 
-        print()
+    # 文字起こし処理（結果は1件ごとにTSVファイルへ書き込む。再開時は追記）
+    if audio_files:
+        successful, failed = run_transcription(transcribe(audio_files), output_path, append=bool(completed))
+        print_summary(successful, failed, skipped)
 
-    # TSVファイルへの書き込み
-    print("=" * 80)
-    print(f"\n結果をTSVファイルに書き込み中: {output_path}")
+    if not args.persistent:
+        return
 
+    # 常駐モード: 標準入力から1行読むたびに入力ディレクトリを再走査する
+    print("\n待機中: 標準入力から1行読むたびに未処理のファイルを文字起こしします（Ctrl-D で終了）")
     try:
-        with open(output_path, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=['filename', 'text', 'language'], delimiter='\t')
-            writer.writeheader()
-            writer.writerows(results)
-
-        print(f"✓ TSVファイルを出力しました: {output_path}")
-    except Exception as e:
-        print(f"エラー: TSVファイルの書き込みに失敗しました: {e}")
-        sys.exit(1)
+        for _ in sys.stdin:
+            completed = load_completed_filenames(output_path)
+            audio_files = [p for p in find_audio_files(input_dir, tuple(args.extensions)) if sanitize_tsv_field(p.name) not in completed]
+            if not audio_files:
+                continue
 
-    # サマリー
-    print("\n" + "=" * 80)
-    print("処理が完了しました")
-    print(f"  成功: {successful} ファイル")
-    print(f"  失敗: {failed} ファイル")
-    print(f"  合計: {len(audio_files)} ファイル")
-    print("=" * 80)
+            print(f"\n未処理のファイル数: {len(audio_files)}")
+            successful, failed = run_transcription(transcribe(audio_files), output_path, append=output_path.exists())
+            print_summary(successful, failed)
+    except KeyboardInterrupt:
+        print("\n終了します")
 
 
 if __name__ == '__main__':
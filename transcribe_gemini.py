@@ -5,17 +5,21 @@ Google Gemini APIを使用して音声ファイルをテキストに変換し、
 """
 
 import argparse
+import asyncio
 import csv
+import hashlib
+import json
 import os
+import sqlite3
 import sys
 import time
 from pathlib import Path
-from typing import List, Tuple, Optional
+from typing import AsyncIterator, Dict, List, NamedTuple, Optional, Set, Tuple
 
 try:
-    import google.generativeai as genai
+    from google import genai
 except ImportError:
-    print("エラー: google-generativeaiがインストールされていません。")
+    print("エラー: google-genaiがインストールされていません。")
     print("以下のコマンドでインストールしてください:")
     print("  pip install -r requirements_gemini.txt")
     sys.exit(1)
@@ -32,12 +36,141 @@ def find_audio_files(directory: Path, extensions: Tuple[str, ...] = ('.wav', '.m
     Returns:
         見つかった音声ファイルのPathオブジェクトのリスト
     """
+    # ディレクトリツリーを一度だけ走査し、拡張子（大文字・小文字を区別しない）で絞り込む
+    exts = {ext.lower() for ext in extensions}
     audio_files = []
-    for ext in extensions:
-        audio_files.extend(directory.rglob(f'*{ext}'))
+    stack = [str(directory)]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif os.path.splitext(entry.name)[1].lower() in exts:
+                        audio_files.append(Path(entry.path))
+        except OSError:
+            # 読み取れない（または走査中に削除された）ディレクトリは飛ばす
+            continue
     return sorted(audio_files)
 
 
+# TSVの列名（ヘッダー行）
+TSV_FIELDS = ('filename', 'text', 'language')
+
+# テキスト中の区切り文字を空白に置き換える変換表
+_TAB_STRIP = str.maketrans({'\t': ' ', '\r': ' ', '\n': ' '})
+
+
+def sanitize_tsv_field(value: str) -> str:
+    """
+    TSVの列に書き込む値のタブ・改行を空白に置き換えます。
+    """
+    return value.translate(_TAB_STRIP)
+
+
+def _tsv_field(value: str) -> str:
+    # タブ・改行を取り除いた後で引用符を含む場合だけ、csvモジュールと同じ形式で囲む
+    value = sanitize_tsv_field(value)
+    if '"' in value:
+        value = '"' + value.replace('"', '""') + '"'
+    return value
+
+
+def format_tsv_row(filename: str, text: str, language: str) -> str:
+    """
+    文字起こし結果をTSVの1行に整形します。
+
+    ファイル名・テキスト中のタブ・改行は空白に置き換えるため、1件は必ず1行になります。
+    出力は csv.DictWriter（区切り文字はタブ）で書き込んだ場合と同じ形式です（行末は CRLF）。
+    """
+    return f"{_tsv_field(filename)}\t{_tsv_field(text)}\t{_tsv_field(language)}\r\n"
+
+
+def load_completed_filenames(output_path: Path) -> Set[str]:
+    """
+    既存の出力TSVファイルから、処理済みのファイル名を読み込みます。
+
+    Args:
+        output_path: 出力TSVファイルのパス
+
+    Returns:
+        処理済みのファイル名の集合（ファイルが存在しない場合は空集合）
+    """
+    if not output_path.exists():
+        return set()
+
+    # 以前のバージョンが書き込んだ、改行を含むテキストを引用符で囲んだ行も読めるよう csv で読み込む
+    # （長時間の音声の文字起こしは既定の上限の131072文字を超えるため、列の長さの上限を外す。
+    # Windowsでは C の long に収まる値しか指定できない）
+    csv.field_size_limit(min(sys.maxsize, 2 ** 31 - 1))
+    with open(output_path, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f, delimiter='\t')
+        # 1行目はヘッダー
+        next(reader, None)
+        return {sanitize_tsv_field(row[0]) for row in reader if row and row[0]}
+
+
+def file_digest(path: Path) -> str:
+    """
+    ファイル内容のBLAKE2bハッシュ値（128ビット）を計算します。
+    """
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+class TranscriptCache:
+    """
+    文字起こし結果をsqliteに保存するキャッシュです。
+
+    音声ファイルの内容のハッシュ値と、結果に影響する設定（signature）の組を
+    キーとするため、同じ内容のファイルはファイル名が違っても再利用されます。
+
+    reuse が False の場合は以前の実行で保存した結果を返さず（新しい結果で上書きする）、
+    この実行中に保存した結果だけを返します。
+    """
+
+    def __init__(self, path: Path, signature: str, reuse: bool = True):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.signature = signature
+        self.reuse = reuse
+        self._written: Set[str] = set()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS transcripts ('
+            'digest TEXT NOT NULL, signature TEXT NOT NULL, text TEXT NOT NULL, language TEXT, '
+            'PRIMARY KEY (digest, signature))'
+        )
+        self._conn.commit()
+
+    def get(self, digest: str) -> Optional[Tuple[str, str]]:
+        """
+        キャッシュ済みの (文字起こしテキスト, 言語コード) を返します。ない場合は None を返します。
+        """
+        if not self.reuse and digest not in self._written:
+            return None
+
+        row = self._conn.execute(
+            'SELECT text, language FROM transcripts WHERE digest = ? AND signature = ?',
+            (digest, self.signature)
+        ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def put(self, digest: str, text: str, language: str) -> None:
+        """
+        文字起こし結果を保存します。
+        """
+        self._conn.execute(
+            'INSERT OR REPLACE INTO transcripts (digest, signature, text, language) VALUES (?, ?, ?, ?)',
+            (digest, self.signature, text, language)
+        )
+        self._conn.commit()
+        self._written.add(digest)
+
+
 def get_mime_type(file_path: Path) -> str:
     """
     ファイル拡張子からMIMEタイプを取得します。
@@ -61,81 +194,156 @@ def get_mime_type(file_path: Path) -> str:
     return mime_types.get(ext, 'audio/wav')
 
 
-def transcribe_audio(
-    audio_path: Path,
-    model_name: str = 'gemini-2.5-flash',
+def build_prompt(
     language: str = 'ja',
     timestamps: bool = False,
     speaker_diarization: bool = False,
     context: str = None
-) -> Tuple[Optional[str], Optional[str]]:
+) -> str:
     """
-    音声ファイルを文字起こしします。
+    文字起こし用のプロンプトを構築します。
+
+    プロンプトはすべてのファイルで共通のため、実行開始時に一度だけ構築します。
 
     Args:
-        audio_path: 音声ファイルのパス
-        model_name: 使用するGeminiモデル
         language: 言語（プロンプトに使用）
         timestamps: タイムスタンプを含めるか
         speaker_diarization: スピーカー識別を行うか
         context: 背景情報・コンテキスト（任意）
 
     Returns:
-        (文字起こしテキスト, 言語コード) のタプル
+        プロンプト文字列
     """
-    try:
-        # ファイルをアップロード
-        print(f"  アップロード中...")
-        mime_type = get_mime_type(audio_path)
-        audio_file = genai.upload_file(path=str(audio_path), mime_type=mime_type)
+    prompt_parts = []
 
-        # ファイルが処理されるまで待機
-        while audio_file.state.name == "PROCESSING":
-            time.sleep(1)
-            audio_file = genai.get_file(audio_file.name)
+    # 背景情報・コンテキストを追加
+    if context:
+        prompt_parts.append(f"【背景情報】\n{context}\n")
 
-        if audio_file.state.name == "FAILED":
-            raise ValueError(f"ファイルの処理に失敗しました: {audio_file.state.name}")
+    if language == 'auto':
+        prompt_parts.append("Transcribe the following audio.")
+    else:
+        language_names = {
+            'ja': '日本語',
+            'en': 'English',
+            'zh': '中文',
+            'ko': '한국어',
+            'es': 'Español',
+            'fr': 'Français',
+            'de': 'Deutsch'
+        }
+        lang_name = language_names.get(language, language)
+        prompt_parts.append(f"以下の音声を{lang_name}で文字起こししてください。")
 
-        # プロンプトを構築
-        prompt_parts = []
+    if timestamps:
+        prompt_parts.append("各セグメントにタイムスタンプを付けてください。")
 
-        # 背景情報・コンテキストを追加
-        if context:
-            prompt_parts.append(f"【背景情報】\n{context}\n")
+    if speaker_diarization:
+        prompt_parts.append("複数の話者がいる場合は、話者を識別して区別してください（例：話者1、話者2）。")
 
-        if language == 'auto':
-            prompt_parts.append("Transcribe the following audio.")
-        else:
-            language_names = {
-                'ja': '日本語',
-                'en': 'English',
-                'zh': '中文',
-                'ko': '한국어',
-                'es': 'Español',
-                'fr': 'Français',
-                'de': 'Deutsch'
-            }
-            lang_name = language_names.get(language, language)
-            prompt_parts.append(f"以下の音声を{lang_name}で文字起こししてください。")
+    prompt_parts.append("文字起こしのテキストのみを出力してください。説明や注釈は不要です。")
+
+    return "\n".join(prompt_parts)
 
-        if timestamps:
-            prompt_parts.append("各セグメントにタイムスタンプを付けてください。")
 
-        if speaker_diarization:
-            prompt_parts.append("複数の話者がいる場合は、話者を識別して区別してください（例：話者1、話者2）。")
+class StageLimits(NamedTuple):
+    """
+    文字起こしパイプラインの各段階の同時実行数を制限するセマフォの組です。
 
-        prompt_parts.append("文字起こしのテキストのみを出力してください。説明や注釈は不要です。")
+    Attributes:
+        in_flight: アップロードしてから削除するまでの間にあるファイル数の上限
+        upload: 同時に行うアップロード・処理待ちの数の上限
+        generate: 同時に行う文字起こし（generate_content）の数の上限
+        same_content: 同じ内容のファイルを1件ずつ処理するための、ハッシュ値ごとのロック
+    """
+    in_flight: asyncio.Semaphore
+    upload: asyncio.Semaphore
+    generate: asyncio.Semaphore
+    same_content: Dict[str, asyncio.Lock]
+
+
+async def wait_for_file_active(
+    client: genai.Client,
+    audio_file,
+    poll_initial: float = 0.25,
+    poll_max: float = 4.0,
+    poll_deadline: float = 600.0
+):
+    """
+    アップロードしたファイルの処理が完了するまで待機します。
 
-        prompt = "\n".join(prompt_parts)
+    ファイル状態は poll_initial 秒から poll_max 秒まで間隔を倍々に延ばしながら確認します。
 
-        # Gemini APIで文字起こし
-        print(f"  文字起こし中...")
-        model = genai.GenerativeModel(model_name)
-        response = model.generate_content([prompt, audio_file])
+    Args:
+        client: Gemini APIクライアント
+        audio_file: アップロードしたファイル
+        poll_initial: ファイル状態を確認する最初の間隔（秒）
+        poll_max: ファイル状態を確認する間隔の上限（秒）
+        poll_deadline: ファイルの処理完了を待つ最大時間（秒）
 
-        # ファイルを削除（クリーンアップ）
-        genai.delete_file(audio_file.name)
+    Returns:
+        処理が完了したファイル
+    """
+    delay = poll_initial
+    deadline = time.monotonic() + poll_deadline
+    while audio_file.state.name == "PROCESSING":
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"ファイルの処理が {poll_deadline:g} 秒以内に完了しませんでした")
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, poll_max)
+        audio_file = await client.aio.files.get(name=audio_file.name)
+
+    if audio_file.state.name == "FAILED":
+        raise ValueError(f"ファイルの処理に失敗しました: {audio_file.state.name}")
+
+    return audio_file
+
+
+async def upload_and_transcribe(
+    client: genai.Client,
+    audio_path: Path,
+    limits: StageLimits,
+    prompt: str,
+    model_name: str = 'gemini-2.5-flash',
+    language: str = 'ja',
+    poll_initial: float = 0.25,
+    poll_max: float = 4.0,
+    poll_deadline: float = 600.0
+) -> Tuple[Optional[str], Optional[str]]:
+    """
+    音声ファイルをアップロードして文字起こしします。
+
+    アップロード（処理待ちを含む）と文字起こしはそれぞれ limits の
+    upload / generate で同時実行数が制限されるため、あるファイルの文字起こし中に
+    次のファイルのアップロードを進めることができます。
+
+    Args:
+        client: Gemini APIクライアント
+        audio_path: 音声ファイルのパス
+        limits: 各段階の同時実行数を制限するセマフォ
+        prompt: build_prompt で構築したプロンプト
+        model_name: 使用するGeminiモデル
+        language: 言語コード（出力TSVの言語列に使用）
+        poll_initial: ファイル状態を確認する最初の間隔（秒）
+        poll_max: ファイル状態を確認する間隔の上限（秒）
+        poll_deadline: ファイルの処理完了を待つ最大時間（秒）
+
+    Returns:
+        (文字起こしテキスト, 言語コード) のタプル
+    """
+    audio_file = None
+    try:
+        # ファイルをアップロードし、処理が完了するまで待機
+        async with limits.upload:
+            print(f"  {audio_path.name}: アップロード中...")
+            mime_type = get_mime_type(audio_path)
+            audio_file = await client.aio.files.upload(file=str(audio_path), config={'mime_type': mime_type})
+            audio_file = await wait_for_file_active(client, audio_file, poll_initial, poll_max, poll_deadline)
+
+        # Gemini APIで文字起こし
+        async with limits.generate:
+            print(f"  {audio_path.name}: 文字起こし中...")
+            response = await client.aio.models.generate_content(model=model_name, contents=[prompt, audio_file])
 
         text = response.text.strip()
 
@@ -148,6 +356,154 @@ def transcribe_audio(
         print(f"  エラー: {audio_path.name} の処理中にエラーが発生しました: {e}")
         return None, None
 
+    finally:
+        # ファイルを削除（クリーンアップ）
+        if audio_file is not None:
+            try:
+                await client.aio.files.delete(name=audio_file.name)
+            except Exception as e:
+                print(f"  警告: {audio_path.name} のアップロードファイルを削除できませんでした: {e}")
+
+
+async def transcribe_audio(
+    client: genai.Client,
+    audio_path: Path,
+    limits: StageLimits,
+    cache: Optional[TranscriptCache] = None,
+    **options
+) -> Tuple[Optional[str], Optional[str]]:
+    """
+    音声ファイルを文字起こしします。
+
+    cache が指定されている場合は、処理を始める時点でファイルのハッシュ値を計算し、
+    同じ内容のファイルの結果がキャッシュにあればアップロードせずにその結果を返します。
+
+    Args:
+        client: Gemini APIクライアント
+        audio_path: 音声ファイルのパス
+        limits: 各段階の同時実行数を制限するセマフォ
+        cache: 文字起こし結果のキャッシュ（Noneの場合は使わない）
+        **options: upload_and_transcribe に渡すオプション
+
+    Returns:
+        (文字起こしテキスト, 言語コード) のタプル
+    """
+    async with limits.in_flight:
+        digest = None
+        if cache is not None:
+            try:
+                digest = await asyncio.get_running_loop().run_in_executor(None, file_digest, audio_path)
+            except OSError:
+                # 読み込めないファイルのエラーは、アップロードの際に報告する
+                pass
+
+        if digest is None:
+            return await upload_and_transcribe(client, audio_path, limits, **options)
+
+        # 同じ内容のファイルが同時に処理されている場合は、その結果を待って使う
+        async with limits.same_content.setdefault(digest, asyncio.Lock()):
+            cached = cache.get(digest)
+            if cached is not None:
+                print(f"  {audio_path.name}: キャッシュ済みの結果を使用")
+                return cached
+
+            text, detected_language = await upload_and_transcribe(client, audio_path, limits, **options)
+            if text is not None:
+                cache.put(digest, text, detected_language)
+
+            return text, detected_language
+
+
+async def transcribe_files(
+    client: genai.Client,
+    audio_files: List[Path],
+    concurrency: int = 8,
+    upload_workers: int = 4,
+    generate_workers: int = 4,
+    **options
+) -> AsyncIterator[Tuple[Path, Optional[str], Optional[str]]]:
+    """
+    複数の音声ファイルを並行して文字起こしします。
+
+    アップロード・処理待ち・文字起こしはネットワーク待ちが大半のため、
+    アップロードと文字起こしを別々の段階として並行させます。結果は入力の順番どおりに、
+    各ファイルの処理が終わりしだい返されます。
+
+    Args:
+        client: Gemini APIクライアント
+        audio_files: 音声ファイルのリスト
+        concurrency: アップロードから削除までの間にあるファイル数の上限
+        upload_workers: 同時に行うアップロードの数の上限
+        generate_workers: 同時に行う文字起こしの数の上限
+        **options: transcribe_audio に渡すオプション
+
+    Yields:
+        (音声ファイルのパス, 文字起こしテキスト, 言語コード) のタプル
+    """
+    limits = StageLimits(
+        in_flight=asyncio.Semaphore(concurrency),
+        upload=asyncio.Semaphore(upload_workers),
+        generate=asyncio.Semaphore(generate_workers),
+        same_content={}
+    )
+    tasks = [
+        asyncio.ensure_future(transcribe_audio(client, audio_path, limits, **options))
+        for audio_path in audio_files
+    ]
+
+    try:
+        for audio_path, task in zip(audio_files, tasks):
+            text, language = await task
+            yield audio_path, text, language
+    finally:
+        # 中断された場合は未完了のタスクをキャンセルする
+        for task in tasks:
+            task.cancel()
+
+
+async def write_transcriptions(
+    transcriptions: AsyncIterator[Tuple[Path, Optional[str], Optional[str]]],
+    output_file,
+    total: int,
+    write_header: bool = True
+) -> Tuple[int, int]:
+    """
+    文字起こし結果を受け取りしだい、1件ずつTSVファイルへ書き込みます。
+
+    Args:
+        transcriptions: transcribe_files が返す文字起こし結果
+        output_file: 書き込み先のファイルオブジェクト
+        total: 処理対象のファイル数（進捗表示用）
+        write_header: ヘッダー行を書き込むか
+
+    Returns:
+        (成功したファイル数, 失敗したファイル数) のタプル
+    """
+    successful = 0
+    failed = 0
+
+    if write_header:
+        output_file.write('\t'.join(TSV_FIELDS) + '\r\n')
+
+    i = 0
+    async for audio_path, text, language in transcriptions:
+        i += 1
+        print(f"[{i}/{total}] {audio_path.name}")
+
+        if text is not None:
+            output_file.write(format_tsv_row(audio_path.name, text, language))
+            output_file.flush()
+            successful += 1
+            # 処理結果のプレビュー（最初の80文字）
+            preview = text[:80] + '...' if len(text) > 80 else text
+            print(f"  完了: {preview}")
+        else:
+            failed += 1
+
+        print()
+
+    return successful, failed
+
 
 def main():
     parser = argparse.ArgumentParser(
@@ -247,8 +603,93 @@ def main():
         help='背景情報・コンテキスト（例: "これはゲーム開発に関する音声です"）'
     )
 
+    parser.add_argument(
+        '--concurrency', '-j',
+        type=int,
+        default=8,
+        help='同時に処理するファイル数（アップロードから削除まで）の上限（デフォルト: 8）'
+    )
+
+    parser.add_argument(
+        '--upload-workers',
+        type=int,
+        default=4,
+        help='同時に行うアップロードの数の上限（デフォルト: 4）'
+    )
+
+    parser.add_argument(
+        '--generate-workers',
+        type=int,
+        default=4,
+        help='同時に行う文字起こし（generate_content）の数の上限（デフォルト: 4）'
+    )
+
+    parser.add_argument(
+        '--poll-initial',
+        type=float,
+        default=0.25,
+        help='アップロードしたファイルの状態を確認する最初の間隔（秒）（デフォルト: 0.25）'
+    )
+
+    parser.add_argument(
+        '--poll-max',
+        type=float,
+        default=4.0,
+        help='ファイルの状態を確認する間隔の上限（秒）（デフォルト: 4.0）'
+    )
+
+    parser.add_argument(
+        '--poll-deadline',
+        type=float,
+        default=600.0,
+        help='ファイルの処理完了を待つ最大時間（秒）（デフォルト: 600）'
+    )
+
+    parser.add_argument(
+        '--resume',
+        dest='resume',
+        action='store_true',
+        help='出力TSVファイルに記録済みのファイルをスキップし、追記で再開（デフォルト）'
+    )
+
+    parser.add_argument(
+        '--no-resume', '--overwrite',
+        dest='resume',
+        action='store_false',
+        help='処理済みのファイルもすべて文字起こしし、出力TSVファイルを上書き'
+    )
+
+    parser.set_defaults(resume=True)
+
+    parser.add_argument(
+        '--transcript-cache',
+        type=str,
+        default=None,
+        help='文字起こし結果のキャッシュ（sqlite）のパス（デフォルト: .cache/transcripts.sqlite）'
+    )
+
+    parser.add_argument(
+        '--no-transcript-cache',
+        dest='transcript_cache_enabled',
+        action='store_false',
+        help='文字起こし結果のキャッシュを使わない'
+    )
+
     args = parser.parse_args()
 
+    for name in ('concurrency', 'upload_workers', 'generate_workers'):
+        if getattr(args, name) < 1:
+            print(f"エラー: --{name.replace('_', '-')} には1以上の値を指定してください: {getattr(args, name)}")
+            sys.exit(1)
+
+    if args.poll_initial <= 0 or args.poll_max < args.poll_initial:
+        print("エラー: --poll-initial は0より大きく、--poll-max 以下の値を指定してください")
+        sys.exit(1)
+
+    if args.poll_deadline <= 0:
+        print(f"エラー: --poll-deadline には0より大きい値を指定してください: {args.poll_deadline:g}")
+        sys.exit(1)
+
     # API キーの設定
     api_key = args.api_key or os.getenv('GEMINI_API_KEY')
     if not api_key:
@@ -260,7 +701,7 @@ def main():
         print("  https://ai.google.dev/ にアクセスして取得してください")
         sys.exit(1)
 
-    genai.configure(api_key=api_key)
+    client = genai.Client(api_key=api_key)
 
     # 入力ディレクトリの確認
     input_dir = Path(args.input)
@@ -286,6 +727,19 @@ def main():
 
     print(f"見つかったファイル数: {len(audio_files)}")
 
+    # 処理済みファイルのスキップ
+    completed = load_completed_filenames(output_path) if args.resume else set()
+    if completed:
+        total_found = len(audio_files)
+        audio_files = [p for p in audio_files if sanitize_tsv_field(p.name) not in completed]
+        skipped = total_found - len(audio_files)
+        print(f"処理済みのためスキップ: {skipped} ファイル（--overwrite で再処理）")
+        if not audio_files:
+            print("すべてのファイルが処理済みです")
+            sys.exit(0)
+    else:
+        skipped = 0
+
     # Gemini API の準備確認
     print(f"\nGemini API設定:")
     print(f"  モデル: {args.model}")
@@ -294,64 +748,79 @@ def main():
     print(f"  スピーカー識別: {'有効' if args.speaker_diarization else '無効'}")
     if args.context:
         print(f"  背景情報: {args.context}")
+    print(f"  同時処理数: {args.concurrency}（アップロード: {args.upload_workers}、文字起こし: {args.generate_workers}）")
     print()
 
-    # 文字起こし処理
-    results = []
-    successful = 0
-    failed = 0
+    # 出力TSVファイルを開く（再開時は追記し、ヘッダーは書き込まない）
+    append = bool(completed)
+    try:
+        output_file = open(output_path, 'a' if append else 'w', newline='', encoding='utf-8')
+    except OSError as e:
+        print(f"エラー: TSVファイルを開けませんでした: {e}")
+        sys.exit(1)
 
+    # 文字起こし処理（結果は1件ごとにTSVファイルへ書き込む）
     print("文字起こしを開始します...")
     print("=" * 80)
 
-    for i, audio_path in enumerate(audio_files, 1):
-        print(f"[{i}/{len(audio_files)}] 処理中: {audio_path.name}")
-
-        text, language = transcribe_audio(
-            audio_path,
-            model_name=args.model,
-            language=args.language,
-            timestamps=args.timestamps,
-            speaker_diarization=args.speaker_diarization,
-            context=args.context
-        )
-
-        if text is not None:
-            results.append({
-                'filename': audio_path.name,
-                'text': text,
-                'language': language
-            })
-            successful += 1
-            # 処理結果のプレビュー（最初の80文字）
-            preview = text[:80] + '...' if len(text) > 80 else text
-            print(f"  完了: {preview}")
-        else:
-            failed += 1
-
-        print()
+    # プロンプトは全ファイル共通のため一度だけ構築する
+    prompt = build_prompt(
+        language=args.language,
+        timestamps=args.timestamps,
+        speaker_diarization=args.speaker_diarization,
+        context=args.context
+    )
 
-    # TSVファイルへの書き込み
-    print("=" * 80)
-    print(f"\n結果をTSVファイルに書き込み中: {output_path}")
+    # 同じ内容のファイルは文字起こし結果のキャッシュを使う（プロンプトが同じ場合のみ）
+    # （--overwrite の場合は以前の結果を読まずに、新しい結果で上書きする）
+    cache = None
+    if args.transcript_cache_enabled:
+        cache_path = Path(args.transcript_cache or '.cache/transcripts.sqlite')
+        signature = json.dumps({'backend': 'gemini', 'model': args.model, 'prompt': prompt}, sort_keys=True)
+        try:
+            cache = TranscriptCache(cache_path, signature, reuse=args.resume)
+        except (OSError, sqlite3.Error) as e:
+            print(f"エラー: 文字起こし結果のキャッシュを開けませんでした: {cache_path}: {e}")
+            sys.exit(1)
+
+    transcriptions = transcribe_files(
+        client,
+        audio_files,
+        concurrency=args.concurrency,
+        upload_workers=args.upload_workers,
+        generate_workers=args.generate_workers,
+        prompt=prompt,
+        model_name=args.model,
+        language=args.language,
+        poll_initial=args.poll_initial,
+        poll_max=args.poll_max,
+        poll_deadline=args.poll_deadline,
+        cache=cache
+    )
 
     try:
-        with open(output_path, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=['filename', 'text', 'language'], delimiter='\t')
-            writer.writeheader()
-            writer.writerows(results)
-
-        print(f"✓ TSVファイルを出力しました: {output_path}")
-    except Exception as e:
+        with output_file:
+            successful, failed = asyncio.run(
+                write_transcriptions(transcriptions, output_file, len(audio_files), write_header=not append)
+            )
+    except KeyboardInterrupt:
+        print(f"\n中断しました。処理済みの結果は {output_path} に保存されています（再実行すると続きから処理します）")
+        sys.exit(130)
+    except OSError as e:
         print(f"エラー: TSVファイルの書き込みに失敗しました: {e}")
         sys.exit(1)
 
+    print("=" * 80)
+    print(f"\n✓ TSVファイルを出力しました: {output_path}")
+
     # サマリー
     print("\n" + "=" * 80)
     print("処理が完了しました")
     print(f"  成功: {successful} ファイル")
     print(f"  失敗: {failed} ファイル")
-    print(f"  合計: {len(audio_files)} ファイル")
+    if skipped:
+        print(f"  スキップ: {skipped} ファイル（処理済み）")
+    print(f"  合計: {len(audio_files) + skipped} ファイル")
     print("=" * 80)
 
 